@@ -1,9 +1,39 @@
 import tkinter as tk
 from tkinter import *
-from tkinter import filedialog, messagebox, font, colorchooser
+from tkinter import filedialog, messagebox, font, colorchooser, simpledialog
 from tkinter.ttk import Separator
+import base64
+import bisect
+import bz2
+import codecs
+import ctypes
+import fnmatch
+import gzip
+import hashlib
+import html
+import io
+import itertools
+import lzma
+import multiprocessing
 import os
 import platform
+import posixpath
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from array import array
+from collections import Counter, OrderedDict, deque
+from html.parser import HTMLParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
 
 try:
     from docx import Document
@@ -13,14 +43,1701 @@ try:
 except ImportError:
     HAVE_DOCX = False
 
+try:
+    from PIL import Image, ImageTk
+    HAVE_PIL = True
+except ImportError:
+    HAVE_PIL = False
+
+TEXT_ENCODINGS = ['utf-8', 'latin-1', 'cp1252', 'utf-16']
+
+
+def read_text_file(file_path):
+    """Decode a text file with the first encoding that fits; returns (content, encoding)"""
+    for encoding in TEXT_ENCODINGS:
+        try:
+            with open(file_path, 'r', encoding=encoding) as file:
+                return file.read(), encoding
+        except UnicodeDecodeError:
+            continue
+    # If all encodings fail, try binary mode as last resort
+    with open(file_path, 'rb') as file:
+        return file.read().decode('utf-8', errors='replace'), 'utf-8'
+
+
+def detect_text_encoding(file_path, sample_size=65536):
+    """Pick the first of TEXT_ENCODINGS that decodes the start of the file"""
+    with open(file_path, 'rb') as file:
+        return detect_sample_encoding(file.read(sample_size))
+
+
+def detect_sample_encoding(sample):
+    for encoding in TEXT_ENCODINGS:
+        try:
+            # Incremental decoding tolerates a multi-byte character cut off by the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'utf-8'
+
+
+# Transparent compression: codec by extension, magic bytes for files with
+# another extension, and the decompressed chunk size used while streaming
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+# bzip2's "BZh" is plain ASCII, so its block size digit and block magic are required too
+COMPRESSION_MAGIC = ((re.compile(b"\x1f\x8b"), "gzip"),
+                     (re.compile(b"BZh[1-9]\x31\x41\x59\x26\x53\x59"), "bz2"),
+                     (re.compile(b"\xfd7zXZ\x00"), "xz"))
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def detect_compression(file_path, sniff=True):
+    """Return "gzip", "bz2", "xz" or None from the extension, or else the magic bytes"""
+    codec = COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+    if codec or not sniff:
+        return codec
+    try:
+        with open(file_path, 'rb') as file:
+            head = file.read(10)
+    except OSError:
+        return None
+    for magic, codec in COMPRESSION_MAGIC:
+        if magic.match(head):
+            return codec
+    return None
+
+
+def can_decompress(file_path, codec):
+    """Return whether the start of file_path actually decodes as codec"""
+    try:
+        with open(file_path, 'rb') as raw, open_compressed(raw, codec) as stream:
+            stream.read(1)
+    except (OSError, EOFError, lzma.LZMAError):
+        return False
+    return True
+
+
+def open_compressed(raw, codec):
+    """Wrap a binary file object in the stdlib decompressor for codec"""
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if codec == "bz2":
+        return bz2.BZ2File(raw, 'rb')
+    return lzma.LZMAFile(raw, 'rb')
+
+
+def read_text_stream(file_path, sink, progress=None, cancelled=None):
+    """Decode a possibly compressed file chunk by chunk, passing text to sink
+
+    The encoding is chosen from the first decompressed chunk with the same
+    TEXT_ENCODINGS order as read_text_file. progress(done, total) is
+    called with compressed bytes consumed. Returns the encoding, or None
+    if cancelled.
+    """
+    codec = detect_compression(file_path)
+    total = os.path.getsize(file_path)
+    with open(file_path, 'rb') as raw:
+        stream = open_compressed(raw, codec) if codec else raw
+        sample = stream.read(STREAM_CHUNK_SIZE)
+        encoding = detect_sample_encoding(sample)
+        stream.seek(0)
+        # TextIOWrapper gives incremental decoding plus universal newlines
+        with io.TextIOWrapper(stream, encoding=encoding, errors='replace') as text_stream:
+            while True:
+                if cancelled and cancelled.is_set():
+                    return None
+                chunk = text_stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sink(chunk)
+                if progress:
+                    progress(raw.tell(), total)
+    return encoding
+
+
+def open_text_output(file_path, codec=None, encoding='utf-8'):
+    """Open file_path for writing text, compressed with codec if given"""
+    # Opened by name so closing the stream also closes the file (needed before renaming on Windows)
+    if codec == "gzip":
+        return gzip.open(file_path, 'wt', compresslevel=6, encoding=encoding)
+    if codec == "bz2":
+        return bz2.open(file_path, 'wt', encoding=encoding)
+    if codec == "xz":
+        return lzma.open(file_path, 'wt', encoding=encoding)
+    return open(file_path, 'w', encoding=encoding)
+
+# Page geometry for PDF/PostScript export, in points
+PAGE_SIZES = {"Letter": (612, 792), "A4": (595, 842)}
+EXPORT_MARGIN = 72
+EXPORT_TAB_SIZE = 4
+# Windows prints through a temp file; it is removed after this delay
+PRINT_TEMP_LIFETIME_MS = 60000
+# Zoom key repeats arriving within this window are applied as one font change
+ZOOM_COALESCE_MS = 40
+# Undo history tuning: memory cap, payload size worth compressing, and how
+# long a typing run may keep merging into one step before a checkpoint
+UNDO_MEMORY_LIMIT = 64 * 1024 * 1024
+UNDO_COMPRESS_MIN = 1024
+UNDO_CHECKPOINT_SECONDS = 1.0
+UNDO_MERGE_LIMIT = 4096
+UNDO_OP_OVERHEAD = 64
+
+
+# External change detection: poll interval, and in follow mode the most
+# bytes read per poll and the number of lines kept in the buffer
+WATCH_POLL_MS = 1000
+FOLLOW_READ_LIMIT = 4 * 1024 * 1024
+FOLLOW_MAX_LINES = 100000
+
+
+class FileWatcher:
+    """Detects external changes to a file, via inotify on Linux or stat polling elsewhere"""
+
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+    IN_MOVE_SELF, IN_DELETE_SELF = 0x800, 0x400
+    IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+    TAIL_SAMPLE = 64
+
+    def __init__(self, path):
+        self.path = path
+        self._inotify_fd = None
+        self._libc = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._libc = ctypes.CDLL(None, use_errno=True)
+                fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+                if fd >= 0:
+                    self._inotify_fd = fd
+            except (OSError, AttributeError):
+                self._libc = None
+        self.snapshot()
+
+    def _add_watch(self):
+        if self._inotify_fd is not None:
+            mask = (self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE
+                    | self.IN_MOVE_SELF | self.IN_DELETE_SELF)
+            self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(self.path), mask)
+
+    def _read_tail(self, size):
+        start = max(0, size - self.TAIL_SAMPLE)
+        with open(self.path, 'rb') as file:
+            file.seek(start)
+            return file.read(size - start)
+
+    def snapshot(self):
+        """Record the file's current state as the known, in-sync version"""
+        try:
+            self.stat = os.stat(self.path)
+            self.size = self.stat.st_size
+            self.tail = self._read_tail(self.size)
+        except OSError:
+            self.stat, self.size, self.tail = None, 0, b""
+        self._add_watch()
+
+    def poll(self):
+        """Return None, "appended", "modified" or "deleted" since the last snapshot"""
+        if self._inotify_fd is not None and self.stat is not None:
+            # No queued inotify events means nothing changed; skip the stat
+            try:
+                os.read(self._inotify_fd, 4096)
+            except BlockingIOError:
+                return None
+            try:
+                while os.read(self._inotify_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            if self.stat is None:
+                return None
+            self.stat = None
+            return "deleted"
+        old = self.stat
+        if old is not None and (current.st_mtime_ns, current.st_size, current.st_ino) == (
+                old.st_mtime_ns, old.st_size, old.st_ino):
+            return None
+        if old is None or current.st_ino != old.st_ino:
+            # Recreated or replaced by rename: watch the new inode
+            self.stat = current
+            self._add_watch()
+            return "modified"
+        self.stat = current
+        if current.st_size > self.size and self._read_tail(self.size) == self.tail:
+            return "appended"
+        return "modified"
+
+    def read_appended(self, limit=FOLLOW_READ_LIMIT):
+        """Read up to limit bytes past the last known end of file and advance the offset"""
+        with open(self.path, 'rb') as file:
+            file.seek(self.size)
+            data = file.read(limit)
+        self.size += len(data)
+        self.tail = (self.tail + data)[-self.TAIL_SAMPLE:]
+        return data
+
+    def pending(self):
+        return self.stat is not None and self.stat.st_size > self.size
+
+    def close(self):
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+
+def user_cache_dir(name):
+    """Return the per-user cache directory for name on this platform"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'pypad', name)
+
+
+# Find in Files: files per worker task, in-flight tasks per worker, hit cap
+# per file, and the per-user on-disk cache of extracted .docx text
+FIND_BATCH_SIZE = 32
+FIND_TASKS_PER_WORKER = 4
+FIND_MAX_HITS_PER_FILE = 1000
+DOCX_CACHE_DIR = user_cache_dir("docx")
+DOCX_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def parse_globs(text):
+    return [pattern for pattern in re.split(r"[;,\s]+", text) if pattern]
+
+
+def iter_search_files(root_dir, includes, excludes):
+    """Walk root_dir yielding files whose names match includes and not excludes"""
+    for dir_path, dir_names, file_names in os.walk(root_dir):
+        dir_names[:] = [d for d in dir_names if not any(fnmatch.fnmatch(d, p) for p in excludes)]
+        for name in file_names:
+            if any(fnmatch.fnmatch(name, p) for p in excludes):
+                continue
+            if includes and not any(fnmatch.fnmatch(name, p) for p in includes):
+                continue
+            yield os.path.join(dir_path, name)
+
+
+def docx_cache_ready():
+    """Create DOCX_CACHE_DIR if needed; False unless only this user can reach it"""
+    try:
+        os.makedirs(DOCX_CACHE_DIR, mode=0o700, exist_ok=True)
+        if os.name == 'posix':
+            stat = os.stat(DOCX_CACHE_DIR)
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def prune_docx_cache(max_bytes=DOCX_CACHE_MAX_BYTES):
+    """Delete the least recently used cache entries until the cache fits in max_bytes"""
+    entries = []
+    try:
+        for entry in os.scandir(DOCX_CACHE_DIR):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def docx_text_cached(file_path):
+    """Extract .docx text, reusing a cached copy while the file is unchanged"""
+    if not docx_cache_ready():
+        return EnhancedWordPad.load_docx_with_formatting(file_path)
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    cache_path = os.path.join(DOCX_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".txt")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        # Hits refresh the mtime that prune_docx_cache evicts by
+        os.utime(cache_path)
+        return content
+    except OSError:
+        pass
+    content = EnhancedWordPad.load_docx_with_formatting(file_path)
+    try:
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w', encoding='utf-8') as file:
+            file.write(content)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+    return content
+
+
+def search_files(paths, needle, match_case=False):
+    """Worker task: search a batch of files; returns (files_scanned, [(path, [(line, text), ...])])"""
+    key = needle if match_case else needle.lower()
+    results = []
+    for path in paths:
+        try:
+            if path.lower().endswith('.docx'):
+                if not HAVE_DOCX:
+                    continue
+                content = docx_text_cached(path)
+            elif path.lower().endswith(('.html', '.htm')):
+                # Search the converted text so line numbers match the opened document
+                parts = []
+                import_html(path, parts.append)
+                content = "".join(parts)
+            else:
+                with open(path, 'rb') as file:
+                    head = file.read(8192)
+                # Skip binary files, allowing for UTF-16 text
+                if b"\0" in head and not head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                    continue
+                content, _ = read_text_file(path)
+        except Exception:
+            continue
+        if key not in (content if match_case else content.lower()):
+            continue
+        hits = []
+        for line_number, line in enumerate(content.split('\n'), 1):
+            if key in (line if match_case else line.lower()):
+                hits.append((line_number, line.strip()[:200]))
+                if len(hits) >= FIND_MAX_HITS_PER_FILE:
+                    break
+        results.append((path, hits))
+    return len(paths), results
+
+
+class FindInFilesSearch:
+    """Directory search run on a process pool; hits are streamed through a queue"""
+
+    def __init__(self, root_dir, needle, match_case=False, include="*", exclude="", workers=None):
+        self.root_dir = root_dir
+        self.needle = needle
+        self.match_case = match_case
+        self.includes = parse_globs(include)
+        self.excludes = parse_globs(exclude)
+        self.workers = workers or os.cpu_count() or 1
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.files_scanned = 0
+        self.started = None
+        self.finished = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def files_per_second(self):
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return self.files_scanned / elapsed if elapsed > 0 else 0.0
+
+    def _collect(self, futures):
+        for future in futures:
+            if future.cancelled():
+                continue
+            try:
+                scanned, hits = future.result()
+            except Exception:
+                continue
+            self.files_scanned += scanned
+            for hit in hits:
+                self.results.put(hit)
+
+    def _run(self):
+        # Forking a threaded Tk process is unsafe; workers start from a fresh interpreter
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        in_flight = set()
+        try:
+            batch = []
+            for path in iter_search_files(self.root_dir, self.includes, self.excludes):
+                if self.cancelled.is_set():
+                    break
+                batch.append(path)
+                if len(batch) < FIND_BATCH_SIZE:
+                    continue
+                in_flight.add(pool.submit(search_files, batch, self.needle, self.match_case))
+                batch = []
+                # Bound the work queued ahead of the walk
+                if len(in_flight) >= self.workers * FIND_TASKS_PER_WORKER:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._collect(done)
+            if batch and not self.cancelled.is_set():
+                in_flight.add(pool.submit(search_files, batch, self.needle, self.match_case))
+            while in_flight and not self.cancelled.is_set():
+                done, in_flight = wait(in_flight, timeout=0.2, return_when=FIRST_COMPLETED)
+                self._collect(done)
+        finally:
+            pool.shutdown(wait=not self.cancelled.is_set(), cancel_futures=True)
+            prune_docx_cache()
+            self.finished = time.perf_counter()
+            self.results.put(None)
+
+
+# Inline .docx images: thumbnail bounds in pixels and the decoded-pixel budget
+IMAGE_MAX_WIDTH = 480
+IMAGE_MAX_HEIGHT = 360
+IMAGE_CACHE_LIMIT = 64 * 1024 * 1024
+IMAGE_MARKER_PATTERN = r"\[IMAGE:(\w+):(\d+)x(\d+)\]"
+IMAGE_MARKER_LINE = re.compile(IMAGE_MARKER_PATTERN)
+EMU_PER_PIXEL = 9525
+
+
+def docx_image_marker(rel_id, width, height):
+    return f"[IMAGE:{rel_id}:{width}x{height}]"
+
+
+def docx_paragraph_images(paragraph):
+    """Return (relationship id, width, height) in pixels for images drawn in a paragraph"""
+    images = []
+    for drawing in paragraph._p.xpath('.//w:drawing'):
+        rel_ids = drawing.xpath('.//a:blip/@r:embed')
+        extents = drawing.xpath('.//wp:extent')
+        if not rel_ids:
+            continue
+        width = height = 0
+        if extents:
+            width = int(extents[0].get('cx', 0)) // EMU_PER_PIXEL
+            height = int(extents[0].get('cy', 0)) // EMU_PER_PIXEL
+        images.append((rel_ids[0], width, height))
+    return images
+
+
+def thumbnail_size(width, height, max_width=IMAGE_MAX_WIDTH, max_height=IMAGE_MAX_HEIGHT):
+    if width <= 0 or height <= 0:
+        return max_width, max_height
+    scale = min(1.0, max_width / width, max_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+class DocxImageSource:
+    """Reads embedded image bytes from a .docx package on demand"""
+
+    def __init__(self, path):
+        self.path = path
+        self._targets = None
+
+    def _load_targets(self):
+        with zipfile.ZipFile(self.path) as package:
+            rels = ET.fromstring(package.read("word/_rels/document.xml.rels"))
+        self._targets = {}
+        for rel in rels:
+            if rel.get("TargetMode") == "External":
+                continue
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join("word", target))
+            self._targets[rel.get("Id")] = target
+
+    def read(self, rel_id):
+        if self._targets is None:
+            self._load_targets()
+        with zipfile.ZipFile(self.path) as package:
+            return package.read(self._targets[rel_id])
+
+
+def decode_thumbnail(data, max_width, max_height, master=None):
+    """Decode image bytes into a PhotoImage no larger than the given bounds, or None"""
+    if HAVE_PIL:
+        try:
+            image = Image.open(io.BytesIO(data))
+            # draft() lets JPEG decode directly at a reduced scale
+            image.draft("RGB", (max_width, max_height))
+            image.thumbnail((max_width, max_height))
+            return ImageTk.PhotoImage(image, master=master)
+        except Exception:
+            return None
+    # Without Pillow, Tk can decode PNG and GIF itself
+    try:
+        photo = PhotoImage(master=master, data=base64.b64encode(data))
+    except TclError:
+        return None
+    factor = max(-(-photo.width() // max_width), -(-photo.height() // max_height), 1)
+    return photo.subsample(factor) if factor > 1 else photo
+
+
+class ThumbnailCache:
+    """LRU cache of decoded thumbnails, bounded by their pixel memory"""
+
+    def __init__(self, max_bytes=IMAGE_CACHE_LIMIT):
+        self.max_bytes = max_bytes
+        self.memory = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, image):
+        cost = image.width() * image.height() * 4
+        if key in self._items:
+            self.memory -= self._items.pop(key)[1]
+        self._items[key] = (image, cost)
+        self.memory += cost
+        while self.memory > self.max_bytes and len(self._items) > 1:
+            _, (_, evicted_cost) = self._items.popitem(last=False)
+            self.memory -= evicted_cost
+
+    def clear(self):
+        self._items.clear()
+        self.memory = 0
+
+
+# Clipboard transfers above the threshold are inserted in slices of at most
+# PASTE_SLICE_SECONDS per event-loop turn; beyond the viewer threshold the
+# user is offered a read-only viewer instead
+PASTE_CHUNK_THRESHOLD = 256 * 1024
+PASTE_CHUNK_SIZE = 64 * 1024
+PASTE_SLICE_SECONDS = 0.03
+PASTE_VIEWER_THRESHOLD = 32 * 1024 * 1024
+CUT_CHUNK_LINES = 2000
+
+
+# HTML import/export: read size per parser feed; streamed loads and saves
+# move STREAM_BATCH_LINES lines per batch with at most STREAM_QUEUE_DEPTH
+# batches queued between the Tk thread and the worker
+HTML_CHUNK_SIZE = 64 * 1024
+STREAM_BATCH_LINES = 1000
+STREAM_QUEUE_DEPTH = 16
+HTML_HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3}
+HTML_INLINE_MARKERS = {"b": "**", "strong": "**", "i": "*", "em": "*", "u": "_"}
+HTML_BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h4", "h5", "h6", "blockquote", "pre",
+                   "section", "article", "header", "footer", "table", "ul", "ol", "hr"}
+HTML_SKIP_TAGS = {"script", "style", "head", "title", "noscript"}
+_HTML_WHITESPACE = re.compile(r"\s+")
+_BOLD_MARKER = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC_MARKER = re.compile(r"(?<![*\w])\*(?![\s*])([^*]+?)\*(?![*\w])")
+_UNDERLINE_MARKER = re.compile(r"(?<!\w)_(?!\s)([^_]+?)_(?!\w)")
+
+
+class HtmlImportParser(HTMLParser):
+    """Incremental HTML to PyPad text converter; <b>/<i>/<u>/<h1-3> become formatting markers"""
+
+    def __init__(self, emit):
+        super().__init__(convert_charrefs=True)
+        self.emit = emit
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._at_line_start = True
+
+    def _newline(self):
+        if not self._at_line_start:
+            self.emit("\n")
+            self._at_line_start = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HTML_SKIP_TAGS:
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag in HTML_HEADING_TAGS:
+            self._newline()
+            self.emit("#" * HTML_HEADING_TAGS[tag] + " ")
+            self._at_line_start = False
+        elif tag in HTML_INLINE_MARKERS:
+            self.emit(HTML_INLINE_MARKERS[tag])
+            self._at_line_start = False
+        elif tag == "br":
+            self.emit("\n")
+            self._at_line_start = True
+        elif tag in HTML_BLOCK_TAGS:
+            self._newline()
+            if tag == "pre":
+                self._pre_depth += 1
+            elif tag == "li":
+                self.emit("• ")
+                self._at_line_start = False
+
+    def handle_endtag(self, tag):
+        if tag in HTML_SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif self._skip_depth:
+            return
+        elif tag in HTML_INLINE_MARKERS:
+            self.emit(HTML_INLINE_MARKERS[tag])
+        elif tag in HTML_HEADING_TAGS or (tag in HTML_BLOCK_TAGS and tag != "br"):
+            if tag == "pre":
+                self._pre_depth = max(0, self._pre_depth - 1)
+            self._newline()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if not self._pre_depth:
+            data = _HTML_WHITESPACE.sub(" ", data)
+            if self._at_line_start:
+                data = data.lstrip()
+        if data:
+            self.emit(data)
+            self._at_line_start = data.endswith("\n")
+
+
+def import_html(file_path, sink, cancelled=None, progress=None):
+    """Feed an HTML file to HtmlImportParser in chunks, passing converted text to sink"""
+    output = []
+    parser = HtmlImportParser(output.append)
+    encoding = detect_text_encoding(file_path)
+    total = os.path.getsize(file_path)
+    with open(file_path, 'rb') as raw, io.TextIOWrapper(raw, encoding=encoding, errors='replace') as file:
+        while not (cancelled and cancelled.is_set()):
+            chunk = file.read(HTML_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            if progress:
+                progress(raw.tell(), total)
+            if output:
+                sink("".join(output))
+                output.clear()
+    parser.close()
+    if output:
+        sink("".join(output))
+
+
+def _html_inline(text):
+    text = html.escape(text, quote=False)
+    text = _BOLD_MARKER.sub(r"<b>\1</b>", text)
+    text = _ITALIC_MARKER.sub(r"<i>\1</i>", text)
+    return _UNDERLINE_MARKER.sub(r"<u>\1</u>", text)
+
+
+def pypad_line_to_html(line):
+    """Render one buffer line, with PyPad formatting markers, as an HTML block"""
+    heading = re.match(r"(#{1,3}) (.*)", line)
+    if heading:
+        level = len(heading.group(1))
+        return f"<h{level}>{_html_inline(heading.group(2))}</h{level}>\n"
+    if not line.strip():
+        return "<br>\n"
+    return f"<p>{_html_inline(line)}</p>\n"
+
+
+class LineDigest:
+    """Incremental digest of buffer lines, fed one batch at a time
+
+    Every line contributes its text plus a newline, so the digest does not
+    depend on how the lines were split into batches.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=16)
+
+    def update(self, lines):
+        if lines:
+            self._hash.update(("\n".join(lines) + "\n").encode('utf-8', 'surrogatepass'))
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class TextExportWriter:
+    """Writes buffer lines as plain text, one batch at a time"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def begin(self):
+        pass
+
+    def write_lines(self, lines):
+        self.stream.write("\n".join(lines) + "\n")
+
+    def finish(self):
+        pass
+
+
+class HtmlExportWriter:
+    """Writes buffer lines as an HTML document, one batch at a time"""
+
+    def __init__(self, stream, title, family, size):
+        self.stream = stream
+        self.title = title
+        self.family = family
+        self.size = size
+
+    def begin(self):
+        self.stream.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(self.title)}</title>\n</head>\n"
+            f"<body style=\"font-family: '{html.escape(self.family)}'; font-size: {self.size}pt\">\n")
+
+    def write_lines(self, lines):
+        self.stream.write("".join(pypad_line_to_html(line) for line in lines))
+
+    def finish(self):
+        self.stream.write("</body>\n</html>\n")
+
+
+# Document compare: gaps between patience anchors are diffed with Myers up
+# to this many edits; larger gaps are reported as a single replace hunk
+MYERS_MAX_EDITS = 2000
+
+
+def _patience_anchors(a, a0, a1, b, b0, b1):
+    """Longest increasing run of lines that occur exactly once in both ranges"""
+    a_counts = Counter(a[a0:a1])
+    b_counts = Counter(b[b0:b1])
+    b_positions = {b[j]: j for j in range(b0, b1) if b_counts[b[j]] == 1}
+    candidates = [(i, b_positions[a[i]]) for i in range(a0, a1)
+                  if a_counts[a[i]] == 1 and a[i] in b_positions]
+    # Patience sorting over the b positions finds the longest increasing subsequence
+    tails, tail_ids, previous = [], [], [None] * len(candidates)
+    for n, (_, j) in enumerate(candidates):
+        pile = bisect.bisect_left(tails, j)
+        previous[n] = tail_ids[pile - 1] if pile else None
+        if pile == len(tails):
+            tails.append(j)
+            tail_ids.append(n)
+        else:
+            tails[pile] = j
+            tail_ids[pile] = n
+    anchors = []
+    n = tail_ids[-1] if tail_ids else None
+    while n is not None:
+        anchors.append(candidates[n])
+        n = previous[n]
+    anchors.reverse()
+    return anchors
+
+
+def _myers_blocks(a, a0, a1, b, b0, b1, max_edits=MYERS_MAX_EDITS):
+    """Matching (i, j, length) runs of a Myers shortest edit script, or None if too costly"""
+    n, m = a1 - a0, b1 - b0
+    v = {1: 0}
+    trace = []
+    for d in range(min(max_edits, n + m) + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(trace, n, m, a0, b0)
+    return None
+
+
+def _myers_backtrack(trace, x, y, a0, b0):
+    blocks = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        prev_k = k + 1 if k == -d or (k != d and v[k - 1] < v[k + 1]) else k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        run = min(x - prev_x, y - prev_y) if d else min(x, y)
+        if run > 0:
+            blocks.append((a0 + x - run, b0 + y - run, run))
+        x, y = prev_x, prev_y
+    return blocks
+
+
+def diff_lines(a_lines, b_lines, max_edits=MYERS_MAX_EDITS):
+    """Line diff returning difflib-style opcodes (tag, i1, i2, j1, j2)
+
+    Lines are interned to integers so every comparison is a cheap int
+    compare. Common prefixes/suffixes are trimmed, unique lines anchor the
+    match (patience diff), and the gaps between anchors are filled in with
+    Myers' algorithm.
+    """
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in a_lines]
+    b = [ids.setdefault(line, len(ids)) for line in b_lines]
+    del ids
+    blocks = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        a0, a1, b0, b1 = regions.pop()
+        start = 0
+        while a0 + start < a1 and b0 + start < b1 and a[a0 + start] == b[b0 + start]:
+            start += 1
+        if start:
+            blocks.append((a0, b0, start))
+            a0, b0 = a0 + start, b0 + start
+        end = 0
+        while a1 - end > a0 and b1 - end > b0 and a[a1 - end - 1] == b[b1 - end - 1]:
+            end += 1
+        if end:
+            blocks.append((a1 - end, b1 - end, end))
+            a1, b1 = a1 - end, b1 - end
+        if a0 == a1 or b0 == b1:
+            continue
+        anchors = _patience_anchors(a, a0, a1, b, b0, b1)
+        if anchors:
+            prev_i, prev_j = a0, b0
+            for i, j in anchors:
+                regions.append((prev_i, i, prev_j, j))
+                blocks.append((i, j, 1))
+                prev_i, prev_j = i + 1, j + 1
+            regions.append((prev_i, a1, prev_j, b1))
+        else:
+            blocks.extend(_myers_blocks(a, a0, a1, b, b0, b1, max_edits) or [])
+    
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in sorted(blocks) + [(len(a), len(b), 0)]:
+        if i < block_i and j < block_j:
+            opcodes.append(("replace", i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(("delete", i, block_i, j, j))
+        elif j < block_j:
+            opcodes.append(("insert", i, i, j, block_j))
+        if size:
+            if opcodes and opcodes[-1][0] == "equal":
+                tag, i1, _, j1, _ = opcodes.pop()
+                opcodes.append(("equal", i1, block_i + size, j1, block_j + size))
+            else:
+                opcodes.append(("equal", block_i, block_i + size, block_j, block_j + size))
+        i, j = block_i + size, block_j + size
+    return opcodes
+
+
+# Minimap: canvas width, columns that map to a full-width bar, lines sampled
+# per pixel row and the most pixel rows a single line may occupy
+MINIMAP_WIDTH = 80
+MINIMAP_MAX_COLUMNS = 120
+MINIMAP_SAMPLES = 8
+MINIMAP_LINE_PIXELS = 3
+MINIMAP_REDRAW_MS = 150
+_HEADING_LINE = re.compile(r"\s*#{1,6} ")
+
+
+class MinimapModel:
+    """Per-line lengths and heading/match flags, downsampled to pixel rows on demand"""
+
+    def __init__(self):
+        self.lengths = array('I', [0])
+        self.headings = bytearray(1)
+        self.matches = bytearray(1)
+
+    @property
+    def line_count(self):
+        return len(self.lengths)
+
+    def splice(self, first_line, old_count, lines):
+        """Replace old_count lines starting at first_line (1-based) with the given lines"""
+        start, stop = first_line - 1, first_line - 1 + old_count
+        self.lengths[start:stop] = array('I', [len(line) for line in lines])
+        self.headings[start:stop] = bytes(1 if _HEADING_LINE.match(line) else 0 for line in lines)
+        self.matches[start:stop] = bytes(len(lines))
+
+    def set_matches(self, line_numbers):
+        self.matches = bytearray(len(self.lengths))
+        for line_number in line_numbers:
+            if 0 < line_number <= len(self.matches):
+                self.matches[line_number - 1] = 1
+
+    def rows_used(self, height):
+        return min(height, self.line_count * MINIMAP_LINE_PIXELS)
+
+    def line_for_row(self, row, height):
+        rows = max(1, self.rows_used(height))
+        return min(self.line_count, row * self.line_count // rows + 1)
+
+    def row_for_line(self, line, height):
+        return (line - 1) * self.rows_used(height) // self.line_count
+
+    def rows(self, height):
+        """Yield (longest sampled line length, has heading, has match) per pixel row"""
+        count = self.line_count
+        rows = self.rows_used(height)
+        for row in range(rows):
+            first = row * count // rows
+            last = max(first + 1, (row + 1) * count // rows)
+            step = max(1, (last - first) // MINIMAP_SAMPLES)
+            yield (max(self.lengths[first:last:step]),
+                   self.headings.find(1, first, last) >= 0,
+                   self.matches.find(1, first, last) >= 0)
+
+
+def format_size(num_bytes):
+    for unit in ("B", "KB", "MB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+def index_after(index, text):
+    """Return the Text index reached by inserting text at index"""
+    line, col = map(int, index.split('.'))
+    newlines = text.count('\n')
+    if newlines:
+        return f"{line + newlines}.{len(text) - text.rfind(chr(10)) - 1}"
+    return f"{line}.{col + len(text)}"
+
+
+class UndoStep:
+    """One undoable unit: an ordered list of insert/delete edits"""
+
+    __slots__ = ("ops", "size")
+
+    def __init__(self):
+        # Each op is [kind, index, data]; data is a list of str parts while the
+        # step is open, then a str or zlib-compressed bytes once sealed
+        self.ops = []
+        self.size = 0
+
+    def seal(self):
+        """Join merged parts and compress large payloads; returns the size change"""
+        old_size = self.size
+        self.size = 0
+        for op in self.ops:
+            data = op[2]
+            if isinstance(data, list):
+                data = "".join(data)
+                if len(data) >= UNDO_COMPRESS_MIN:
+                    data = zlib.compress(data.encode('utf-8'), 1)
+                op[2] = data
+            self.size += len(data) + UNDO_OP_OVERHEAD
+        return self.size - old_size
+
+    @staticmethod
+    def _text(data):
+        if isinstance(data, bytes):
+            return zlib.decompress(data).decode('utf-8')
+        return "".join(data) if isinstance(data, list) else data
+
+    def edits(self):
+        for kind, index, data in self.ops:
+            yield kind, index, self._text(data)
+
+    def inverse(self):
+        for kind, index, data in reversed(self.ops):
+            yield ("delete" if kind == "insert" else "insert"), index, self._text(data)
+
+
+class UndoHistory:
+    """Memory-bounded undo/redo history of compressed edit deltas"""
+
+    def __init__(self, max_bytes=UNDO_MEMORY_LIMIT):
+        self.max_bytes = max_bytes
+        self.clear()
+
+    def clear(self):
+        self.undo_steps = deque()
+        self.redo_steps = []
+        self.memory = 0
+        self._open = None
+        self._open_end = None
+        self._group_depth = 0
+        self._discarding = False
+        self._last_edit = 0.0
+
+    def begin_group(self):
+        """Start collecting edits into a single undo step until end_group()"""
+        if not self._group_depth:
+            self.checkpoint()
+        self._group_depth += 1
+
+    def end_group(self):
+        self._group_depth = max(0, self._group_depth - 1)
+        if not self._group_depth:
+            self._discarding = False
+            self.checkpoint()
+
+    @contextmanager
+    def group(self):
+        self.begin_group()
+        try:
+            yield
+        finally:
+            self.end_group()
+
+    def checkpoint(self):
+        """Close the open step so the next edit starts a new one"""
+        if self._open is not None:
+            self.memory += self._open.seal()
+            self._open = None
+            self._enforce_limit()
+
+    def record(self, kind, index, text):
+        if not text:
+            return
+        if self.redo_steps:
+            self.memory -= sum(step.size for step in self.redo_steps)
+            self.redo_steps = []
+        if self._discarding:
+            # The start of this group was evicted; undoing the rest alone would corrupt the buffer
+            return
+        now = time.monotonic()
+        step = self._open
+        if step is not None and not self._group_depth and (
+                now - self._last_edit > UNDO_CHECKPOINT_SECONDS or step.size > UNDO_MERGE_LIMIT):
+            self.checkpoint()
+            step = None
+        if step is None:
+            step = self._open = UndoStep()
+            self._open_end = None
+            self.undo_steps.append(step)
+        self._last_edit = now
+        if not self._merge(step, kind, index, text):
+            step.ops.append([kind, index, [text]])
+            self._open_end = index_after(index, text) if kind == "insert" else None
+        step.size += len(text)
+        self.memory += len(text)
+        if kind == "insert" and '\n' in text and not self._group_depth:
+            self.checkpoint()
+        else:
+            self._enforce_limit()
+
+    def record_replace(self, index, removed, inserted):
+        """Record a widget delete or replace at index
+
+        Only a real replace is grouped; a plain delete is recorded on its
+        own so consecutive Backspace/Delete presses merge like typing does.
+        """
+        if not inserted:
+            self.record("delete", index, removed)
+            return
+        with self.group():
+            self.record("delete", index, removed)
+            self.record("insert", index, inserted)
+
+    def _merge(self, step, kind, index, text):
+        """Extend the last op for contiguous typing, backspacing or chunked inserts"""
+        if not step.ops or step.ops[-1][0] != kind:
+            return False
+        last = step.ops[-1]
+        if kind == "insert":
+            if index != self._open_end:
+                return False
+            last[2].append(text)
+            self._open_end = index_after(index, text)
+        elif index == last[1]:
+            last[2].append(text)
+        elif index_after(index, text) == last[1]:
+            last[2].insert(0, text)
+            last[1] = index
+        else:
+            return False
+        return True
+
+    def set_limit(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.checkpoint()
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        while self.memory > self.max_bytes and self.undo_steps:
+            dropped = self.undo_steps.popleft()
+            if dropped is self._open:
+                self._open = None
+                self._discarding = self._group_depth > 0
+            self.memory -= dropped.size
+        if self.memory > self.max_bytes and self.redo_steps:
+            self.memory -= sum(step.size for step in self.redo_steps)
+            self.redo_steps = []
+
+    def pop_undo(self):
+        self.checkpoint()
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return step
+
+    def pop_redo(self):
+        self.checkpoint()
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return step
+
+
+class FontManager:
+    """Named Tk fonts cached per style; family and size changes mutate them in place"""
+
+    def __init__(self, root, family, size):
+        self.root = root
+        self.family = family
+        self.size = size
+        self._fonts = {}
+
+    def get(self, weight="normal", slant="roman", underline=False):
+        key = (weight, slant, bool(underline))
+        styled = self._fonts.get(key)
+        if styled is None:
+            styled = self._fonts[key] = font.Font(root=self.root, family=self.family, size=self.size,
+                                                  weight=weight, slant=slant, underline=bool(underline))
+        return styled
+
+    def configure(self, family=None, size=None):
+        """Update every cached font; widgets using them relayout once per call"""
+        changes = {}
+        if family is not None and family != self.family:
+            changes["family"] = self.family = family
+        if size is not None and size != self.size:
+            changes["size"] = self.size = size
+        if not changes:
+            return False
+        for styled in self._fonts.values():
+            styled.configure(**changes)
+        return True
+
+
+# Advance widths (1/1000 em) of the standard 14 fonts for WinAnsi codes 32-255,
+# from Adobe's AFM files; obliques share their upright face's widths and
+# every Courier glyph is 600
+AFM_WIDTHS = {
+    "Helvetica": """
+        278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278
+        556 556 556 556 556 556 556 556 556 556 278 278 584 584 584 556
+        1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778
+        667 778 722 667 611 722 667 944 667 667 611 278 278 278 469 556
+        333 556 556 500 556 556 278 556 556 222 222 500 222 833 556 556
+        556 556 333 500 278 556 500 722 500 500 500 334 260 334 584 350
+        556 350 222 556 333 1000 556 556 333 1000 667 333 1000 350 611 350
+        350 222 222 333 333 350 556 1000 333 1000 500 333 944 350 500 667
+        278 333 556 556 556 556 260 556 333 737 370 556 584 333 737 333
+        400 584 333 333 333 556 537 278 333 333 365 556 834 834 834 611
+        667 667 667 667 667 667 1000 722 667 667 667 667 278 278 278 278
+        722 722 778 778 778 778 778 584 778 722 722 722 722 667 667 611
+        556 556 556 556 556 556 889 500 556 556 556 556 278 278 278 278
+        556 556 556 556 556 556 556 584 611 556 556 556 556 500 556 500
+    """,
+    "Helvetica-Bold": """
+        278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278
+        556 556 556 556 556 556 556 556 556 556 333 333 584 584 584 611
+        975 722 722 722 722 667 611 778 722 278 556 722 611 833 722 778
+        667 778 722 667 611 722 667 944 667 667 611 333 278 333 584 556
+        333 556 611 556 611 556 333 611 611 278 278 556 278 889 611 611
+        611 611 389 556 333 611 556 778 556 556 500 389 280 389 584 350
+        556 350 278 556 500 1000 556 556 333 1000 667 333 1000 350 611 350
+        350 278 278 500 500 350 556 1000 333 1000 556 333 944 350 500 667
+        278 333 556 556 556 556 280 556 333 737 370 556 584 333 737 333
+        400 584 333 333 333 611 556 278 333 333 365 556 834 834 834 611
+        722 722 722 722 722 722 1000 722 667 667 667 667 278 278 278 278
+        722 722 778 778 778 778 778 584 778 722 722 722 722 667 667 611
+        556 556 556 556 556 556 889 556 556 556 556 556 278 278 278 278
+        611 611 611 611 611 611 611 584 611 611 611 611 611 556 611 556
+    """,
+    "Times-Roman": """
+        250 333 408 500 500 833 778 180 333 333 500 564 250 333 250 278
+        500 500 500 500 500 500 500 500 500 500 278 278 564 564 564 444
+        921 722 667 667 722 611 556 722 722 333 389 722 611 889 722 722
+        556 722 667 556 611 722 722 944 722 722 611 333 278 333 469 500
+        333 444 500 444 500 444 333 500 500 278 278 500 278 778 500 500
+        500 500 333 389 278 500 500 722 500 500 444 480 200 480 541 350
+        500 350 333 500 444 1000 500 500 333 1000 556 333 889 350 611 350
+        350 333 333 444 444 350 500 1000 333 980 389 333 722 350 444 722
+        250 333 500 500 500 500 200 500 333 760 276 500 564 333 760 333
+        400 564 300 300 333 500 453 250 333 300 310 500 750 750 750 444
+        722 722 722 722 722 722 889 667 611 611 611 611 333 333 333 333
+        722 722 722 722 722 722 722 564 722 722 722 722 722 722 556 500
+        444 444 444 444 444 444 667 444 444 444 444 444 278 278 278 278
+        500 500 500 500 500 500 500 564 500 500 500 500 500 500 500 500
+    """,
+    "Times-Bold": """
+        250 333 555 500 500 1000 833 278 333 333 500 570 250 333 250 278
+        500 500 500 500 500 500 500 500 500 500 333 333 570 570 570 500
+        930 722 667 722 722 667 611 778 778 389 500 778 667 944 722 778
+        611 778 722 556 667 722 722 1000 722 722 667 333 278 333 581 500
+        333 500 556 444 556 444 333 500 556 278 333 556 278 833 556 500
+        556 556 444 389 333 556 500 722 500 500 444 394 220 394 520 350
+        500 350 333 500 500 1000 500 500 333 1000 556 333 1000 350 667 350
+        350 333 333 500 500 350 500 1000 333 1000 389 333 722 350 444 722
+        250 333 500 500 500 500 220 500 333 747 300 500 570 333 747 333
+        400 570 300 300 333 556 540 250 333 300 330 500 750 750 750 500
+        722 722 722 722 722 722 1000 722 667 667 667 667 389 389 389 389
+        722 722 778 778 778 778 778 570 778 722 722 722 722 722 611 556
+        500 500 500 500 500 500 722 444 444 444 444 444 278 278 278 278
+        500 556 500 500 500 500 500 570 500 556 556 556 556 500 556 500
+    """,
+    "Times-Italic": """
+        250 333 420 500 500 833 778 214 333 333 500 675 250 333 250 278
+        500 500 500 500 500 500 500 500 500 500 333 333 675 675 675 500
+        920 611 611 667 722 611 611 722 722 333 444 667 556 833 667 722
+        611 722 611 500 556 722 611 833 611 556 556 389 278 389 422 500
+        333 500 500 444 500 444 278 500 500 278 278 444 278 722 500 500
+        500 500 389 389 278 500 444 667 444 444 389 400 275 400 541 350
+        500 350 333 500 556 889 500 500 333 1000 500 333 944 350 556 350
+        350 333 333 556 556 350 500 889 333 980 389 333 667 350 389 556
+        250 389 500 500 500 500 275 500 333 760 276 500 675 333 760 333
+        400 675 300 300 333 500 523 250 333 300 310 500 750 750 750 500
+        611 611 611 611 611 611 889 667 611 611 611 611 333 333 333 333
+        722 667 722 722 722 722 722 675 722 722 722 722 722 556 611 500
+        500 500 500 500 500 500 667 444 444 444 444 444 278 278 278 278
+        500 500 500 500 500 500 500 675 500 500 500 500 500 444 500 444
+    """,
+    "Times-BoldItalic": """
+        250 389 555 500 500 833 778 278 333 333 500 570 250 333 250 278
+        500 500 500 500 500 500 500 500 500 500 333 333 570 570 570 500
+        832 667 667 667 722 667 667 722 778 389 500 667 611 889 722 722
+        611 722 667 556 611 722 667 889 667 611 611 333 278 333 570 500
+        333 500 500 444 500 444 333 500 556 278 278 500 278 778 556 500
+        500 500 389 389 278 556 444 667 500 444 389 348 220 348 570 350
+        500 350 333 500 500 1000 500 500 333 1000 556 333 944 350 611 350
+        350 333 333 500 500 350 500 1000 333 1000 389 333 722 350 389 611
+        250 389 500 500 500 500 220 500 333 747 266 500 606 333 747 333
+        400 570 300 300 333 576 500 250 333 300 300 500 750 750 750 500
+        667 667 667 667 667 667 944 667 667 667 667 667 389 389 389 389
+        722 722 722 722 722 722 722 570 722 722 722 722 722 611 611 500
+        500 500 500 500 500 500 722 444 444 444 444 444 278 278 278 278
+        500 556 500 500 500 500 500 570 500 556 556 556 556 444 500 444
+    """,
+}
+AFM_ALIASES = {"Helvetica-Oblique": "Helvetica", "Helvetica-BoldOblique": "Helvetica-Bold"}
+
+
+def afm_widths(base_font):
+    """Return the 256 WinAnsi advance widths of a standard 14 font in 1/1000 em"""
+    base_font = AFM_ALIASES.get(base_font, base_font)
+    if base_font not in AFM_WIDTHS:
+        return [0] * 32 + [600] * 224
+    return [0] * 32 + [int(width) for width in AFM_WIDTHS[base_font].split()]
+
+
+class FontMetricsCache:
+    """Per-(base font, size) glyph width cache used for export line breaking
+
+    Widths come from the AFM metrics of the standard 14 font the writers
+    actually emit, not the screen font, so wrapped lines fit the printed page.
+    """
+
+    def __init__(self):
+        self._tables = {}
+        self._afm = {}
+
+    def _glyph_width(self, base_font, size, ch):
+        widths = self._afm.get(base_font)
+        if widths is None:
+            widths = self._afm[base_font] = afm_widths(base_font)
+        try:
+            code = ch.encode('cp1252')[0]
+        except UnicodeEncodeError:
+            # The writers substitute '?' for characters outside their encoding
+            code = ord('?')
+        return widths[code] * size / 1000.0
+
+    def text_width(self, base_font, size, text):
+        """Width of text in points, looking up each distinct glyph only once"""
+        table = self._tables.get((base_font, size))
+        if table is None:
+            table = self._tables[(base_font, size)] = {}
+        total = 0.0
+        for ch in text:
+            width = table.get(ch)
+            if width is None:
+                width = table[ch] = self._glyph_width(base_font, size, ch)
+            total += width
+        return total
+
+
+def wrap_line(line, max_width, width_of):
+    """Greedy word wrap of a single line using a cached width function"""
+    if width_of(line) <= max_width:
+        return [line]
+    wrapped = []
+    current = ""
+    current_width = 0.0
+    space_width = width_of(" ")
+    for word in line.split(" "):
+        word_width = width_of(word)
+        extra = word_width if not current else space_width + word_width
+        if current_width + extra <= max_width:
+            current = word if not current else f"{current} {word}"
+            current_width += extra
+            continue
+        if current:
+            wrapped.append(current)
+        # Words wider than the line are broken at character boundaries
+        current, current_width = "", 0.0
+        for ch in word:
+            ch_width = width_of(ch)
+            if current and current_width + ch_width > max_width:
+                wrapped.append(current)
+                current, current_width = "", 0.0
+            current += ch
+            current_width += ch_width
+    wrapped.append(current)
+    return wrapped
+
+
+def paginate(lines, base_font, size, metrics, page_size="Letter", margin=EXPORT_MARGIN):
+    """Yield pages (lists of output lines) from an iterable of buffer lines"""
+    page_width, page_height = PAGE_SIZES[page_size]
+    max_width = page_width - 2 * margin
+    lines_per_page = max(1, int((page_height - 2 * margin) // (size * 1.2)))
+    width_of = lambda text: metrics.text_width(base_font, size, text)
+    page = []
+    for line in lines:
+        for out_line in wrap_line(line.expandtabs(EXPORT_TAB_SIZE), max_width, width_of):
+            page.append(out_line)
+            if len(page) == lines_per_page:
+                yield page
+                page = []
+    if page:
+        yield page
+
+
+def pdf_base_font(family, bold=False, italic=False):
+    """Map a screen font family onto one of the standard 14 PDF/PostScript fonts"""
+    name = family.lower()
+    if any(key in name for key in ("courier", "mono", "consol")):
+        base, styles = "Courier", ("", "-Bold", "-Oblique", "-BoldOblique")
+    elif any(key in name for key in ("times", "georgia", "garamond", "roman")) or (
+            "serif" in name and "sans" not in name):
+        base, styles = "Times", ("-Roman", "-Bold", "-Italic", "-BoldItalic")
+    else:
+        base, styles = "Helvetica", ("", "-Bold", "-Oblique", "-BoldOblique")
+    return base + styles[(1 if bold else 0) + (2 if italic else 0)]
+
+
+def _escape_string(text, encoding):
+    data = text.encode(encoding, errors='replace')
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"")
+
+
+class PostScriptWriter:
+    """Writes pages as DSC-conforming PostScript, one page at a time"""
+
+    def __init__(self, stream, base_font, font_size, page_size="Letter", margin=EXPORT_MARGIN):
+        self.stream = stream
+        self.base_font = base_font
+        self.font_size = font_size
+        self.page_width, self.page_height = PAGE_SIZES[page_size]
+        self.margin = margin
+        self.page_count = 0
+
+    def begin(self):
+        self.stream.write(
+            b"%%!PS-Adobe-3.0\n%%%%Creator: PyPad\n%%%%Pages: (atend)\n"
+            b"%%%%BoundingBox: 0 0 %d %d\n%%%%EndComments\n" % (self.page_width, self.page_height))
+        # Re-encode the base font so Latin-1 characters print correctly
+        self.stream.write(
+            b"/%s findfont dup length dict begin\n"
+            b"{1 index /FID ne {def} {pop pop} ifelse} forall\n"
+            b"/Encoding ISOLatin1Encoding def currentdict end\n"
+            b"/PyPadFont exch definefont pop\n" % self.base_font.encode('ascii'))
+
+    def write_page(self, lines):
+        self.page_count += 1
+        leading = self.font_size * 1.2
+        y = self.page_height - self.margin - self.font_size
+        out = [b"%%%%Page: %d %d\n/PyPadFont findfont %d scalefont setfont\n"
+               % (self.page_count, self.page_count, self.font_size)]
+        for line in lines:
+            if line:
+                out.append(b"%d %.2f moveto (%s) show\n" % (self.margin, y, _escape_string(line, 'latin-1')))
+            y -= leading
+        out.append(b"showpage\n")
+        self.stream.write(b"".join(out))
+
+    def finish(self):
+        self.stream.write(b"%%%%Trailer\n%%%%Pages: %d\n%%%%EOF\n" % self.page_count)
+
+
+class PdfWriter:
+    """Writes a PDF incrementally; only object offsets are kept in memory"""
+
+    CATALOG_ID, PAGES_ID, FONT_ID = 1, 2, 3
+
+    def __init__(self, stream, base_font, font_size, page_size="Letter", margin=EXPORT_MARGIN):
+        self.stream = stream
+        self.base_font = base_font
+        self.font_size = font_size
+        self.page_width, self.page_height = PAGE_SIZES[page_size]
+        self.margin = margin
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 4
+
+    @property
+    def page_count(self):
+        return len(self.page_ids)
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.position += len(data)
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, body))
+
+    def begin(self):
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self.FONT_ID,
+                     b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                     % self.base_font.encode('ascii'))
+
+    def write_page(self, lines):
+        leading = self.font_size * 1.2
+        top = self.page_height - self.margin - self.font_size
+        out = [b"BT\n/F1 %d Tf\n%.2f TL\n%d %.2f Td\n" % (self.font_size, leading, self.margin, top)]
+        for line in lines:
+            out.append(b"(%s) Tj T*\n" % _escape_string(line, 'cp1252'))
+        out.append(b"ET\n")
+        data = zlib.compress(b"".join(out))
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+                     % (len(data), data))
+        self._object(page_id, b"<< /Type /Page /Parent %d 0 R /Contents %d 0 R >>" % (self.PAGES_ID, content_id))
+        self.page_ids.append(page_id)
+
+    def finish(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(self.PAGES_ID,
+                     b"<< /Type /Pages /Kids [%s] /Count %d /MediaBox [0 0 %d %d] "
+                     b"/Resources << /Font << /F1 %d 0 R >> >> >>"
+                     % (kids, len(self.page_ids), self.page_width, self.page_height, self.FONT_ID))
+        self._object(self.CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES_ID)
+        xref_position = self.position
+        entries = [b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id]
+        for obj_id in range(1, self.next_id):
+            entries.append(b"%010d 00000 n \n" % self.offsets[obj_id])
+        self._write(b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self.next_id, self.CATALOG_ID, xref_position))
+
+
+EXPORT_WRITERS = {"pdf": PdfWriter, "ps": PostScriptWriter}
+
+
+def export_document(lines, stream, fmt, family, size, bold=False, italic=False,
+                    page_size="Letter", metrics=None, progress=None):
+    """Paginate lines and stream them to a PDF or PostScript file; returns the page count"""
+    metrics = metrics or FontMetricsCache()
+    base_font = pdf_base_font(family, bold, italic)
+    writer = EXPORT_WRITERS[fmt](stream, base_font, size, page_size)
+    writer.begin()
+    for page in paginate(lines, base_font, size, metrics, page_size):
+        writer.write_page(page)
+        if progress:
+            progress(writer.page_count)
+    writer.finish()
+    return writer.page_count
+
+
+def benchmark_export(pages=1000, fmt="pdf"):
+    """Measure export throughput in pages per second on a synthetic document"""
+    pages, size = int(pages), 12
+    lines_per_page = int((PAGE_SIZES["Letter"][1] - 2 * EXPORT_MARGIN) // (size * 1.2))
+    sample = "The quick brown fox jumps over the lazy dog."
+    lines = (f"{i:07d} {sample}" for i in range(pages * lines_per_page))
+    with tempfile.TemporaryFile() as stream:
+        start = time.perf_counter()
+        exported = export_document(lines, stream, fmt, "Times New Roman", size)
+        elapsed = time.perf_counter() - start
+        output_size = stream.tell()
+    print(f"export[{fmt}]: {exported} pages in {elapsed:.2f}s "
+          f"({exported / elapsed:.0f} pages/s, {output_size / 1e6:.1f} MB)")
+
+
+def benchmark_zoom(lines=100000, steps=20):
+    """Measure zoom latency on a large buffer: font tuples versus a mutated named font"""
+    lines, steps = int(lines), int(steps)
+    try:
+        root = tk.Tk()
+    except TclError as e:
+        print(f"zoom: skipped, no display available ({e})")
+        return
+    root.withdraw()
+    text = Text(root, wrap="word")
+    text.pack()
+    text.insert("1.0", "The quick brown fox jumps over the lazy dog.\n" * lines)
+    root.update()
+    family = font.nametofont("TkFixedFont").actual("family")
+    
+    start = time.perf_counter()
+    for step in range(steps):
+        text.config(font=(family, 10 + step % 10))
+        root.update_idletasks()
+    tuple_ms = (time.perf_counter() - start) * 1000 / steps
+    
+    manager = FontManager(root, family, 10)
+    text.config(font=manager.get())
+    root.update_idletasks()
+    start = time.perf_counter()
+    for step in range(steps):
+        manager.configure(size=10 + step % 10)
+        root.update_idletasks()
+    named_ms = (time.perf_counter() - start) * 1000 / steps
+    root.destroy()
+    print(f"zoom: {lines} lines, font tuple {tuple_ms:.1f} ms/step, named font {named_ms:.1f} ms/step")
+
+
+def benchmark_find_in_files(files=2000, lines=200):
+    """Measure Find in Files throughput in files per second on a synthetic tree"""
+    files, lines = int(files), int(lines)
+    with tempfile.TemporaryDirectory() as root_dir:
+        for i in range(files):
+            sub_dir = os.path.join(root_dir, f"dir{i % 20}")
+            os.makedirs(sub_dir, exist_ok=True)
+            body = "".join(f"line {n} of file {i} lorem ipsum dolor sit amet\n" for n in range(lines))
+            if i % 10 == 0:
+                body += "needle found here\n"
+            with open(os.path.join(sub_dir, f"file{i}.txt"), 'w', encoding='utf-8') as file:
+                file.write(body)
+        search = FindInFilesSearch(root_dir, "needle", include="*.txt")
+        search.start()
+        search.join()
+        hits = 0
+        while search.results.get() is not None:
+            hits += 1
+    print(f"find-in-files: {search.files_scanned} files, {hits} matching, "
+          f"{search.files_per_second:.0f} files/s with {search.workers} workers")
+
+
+def benchmark_html(megabytes=8):
+    """Measure streaming HTML import and export throughput on a synthetic page"""
+    target = int(float(megabytes) * 1024 * 1024)
+    block = ("<h2>Section heading</h2>\n"
+             + "<p>Lorem <b>ipsum</b> dolor <i>sit</i> amet, <u>consectetur</u> &amp; adipiscing elit.</p>\n" * 20
+             + "<script>var ignored = 1;</script>\n")
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = os.path.join(work_dir, "page.html")
+        with open(source, 'w', encoding='utf-8') as file:
+            file.write("<html><head><title>bench</title></head><body>\n")
+            for _ in range(target // len(block) + 1):
+                file.write(block)
+            file.write("</body></html>\n")
+        source_size = os.path.getsize(source)
+        
+        converted = [0]
+        start = time.perf_counter()
+        import_html(source, lambda text: converted.__setitem__(0, converted[0] + len(text)))
+        import_seconds = time.perf_counter() - start
+        
+        lines = itertools.islice(itertools.cycle(
+            ["## Section heading"] + ["Lorem **ipsum** dolor *sit* amet, _consectetur_ & adipiscing elit."] * 20),
+            converted[0] // 60)
+        target_path = os.path.join(work_dir, "export.html")
+        start = time.perf_counter()
+        with open(target_path, 'w', encoding='utf-8') as stream:
+            writer = HtmlExportWriter(stream, "bench", "Arial", 12)
+            writer.begin()
+            while True:
+                batch = list(itertools.islice(lines, STREAM_BATCH_LINES))
+                if not batch:
+                    break
+                writer.write_lines(batch)
+            writer.finish()
+        export_seconds = time.perf_counter() - start
+        export_size = os.path.getsize(target_path)
+    print(f"html import: {source_size / 1e6:.1f} MB in {import_seconds:.2f}s "
+          f"({source_size / 1e6 / import_seconds:.1f} MB/s)")
+    print(f"html export: {export_size / 1e6:.1f} MB in {export_seconds:.2f}s "
+          f"({export_size / 1e6 / export_seconds:.1f} MB/s)")
+
+
+def benchmark_diff(lines=1000000, changes=1000):
+    """Measure diff_lines on a large document with scattered edits"""
+    lines, changes = int(lines), int(changes)
+    original = [f"{i:08d} The quick brown fox jumps over the lazy dog." for i in range(lines)]
+    revised = list(original)
+    step = max(1, lines // changes)
+    for n, position in enumerate(range(lines - 1, 0, -step)):
+        if n % 3 == 0:
+            revised.insert(position, f"inserted line {n}")
+        elif n % 3 == 1:
+            del revised[position]
+        else:
+            revised[position] = f"changed line {n}"
+    start = time.perf_counter()
+    opcodes = diff_lines(original, revised)
+    elapsed = time.perf_counter() - start
+    hunks = sum(1 for opcode in opcodes if opcode[0] != "equal")
+    print(f"diff: {lines} vs {len(revised)} lines, {hunks} hunks in {elapsed:.2f}s")
+
+
+def benchmark_compression(megabytes=16):
+    """Compare streamed open/save times for plain and compressed text files"""
+    lines = int(float(megabytes) * 1024 * 1024) // 60
+    with tempfile.TemporaryDirectory() as work_dir:
+        for extension in ("", ".gz", ".bz2", ".xz"):
+            path = os.path.join(work_dir, "bench.txt" + extension)
+            start = time.perf_counter()
+            with open_text_output(path, detect_compression(path, sniff=False)) as stream:
+                writer = TextExportWriter(stream)
+                # Numbered lines keep the data from compressing unrealistically well
+                for n in range(0, lines, STREAM_BATCH_LINES):
+                    writer.write_lines([f"{i:08d} The quick brown fox jumps over the lazy dog, again."
+                                        for i in range(n, min(n + STREAM_BATCH_LINES, lines))])
+            save_seconds = time.perf_counter() - start
+            read_chars = [0]
+            start = time.perf_counter()
+            read_text_stream(path, lambda text: read_chars.__setitem__(0, read_chars[0] + len(text)))
+            open_seconds = time.perf_counter() - start
+            print(f"{'bench.txt' + extension:14} {os.path.getsize(path) / 1e6:8.1f} MB on disk | "
+                  f"save {save_seconds:6.2f}s | open {open_seconds:6.2f}s "
+                  f"({read_chars[0] / 1e6 / open_seconds:.0f} M chars/s)")
+
+
+BENCHMARKS = {"export": benchmark_export, "zoom": benchmark_zoom, "find": benchmark_find_in_files,
+              "html": benchmark_html, "diff": benchmark_diff, "compression": benchmark_compression}
+
+
+def run_benchmarks(args):
+    """Run benchmarks from the command line: pypad.py --benchmark [name [arg ...]]"""
+    if args and args[0] in BENCHMARKS:
+        BENCHMARKS[args[0]](*args[1:])
+        return
+    for bench in BENCHMARKS.values():
+        bench()
+
+
 class EnhancedWordPad:
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("PyPad - Enhanced Text Editor")
         self.root.geometry("1100x700")     
         self.current_file = None
-        self.undo_stack = []
-        self.redo_stack = []
+        self.current_encoding = 'utf-8'
+        self.current_compression = None
+        self.file_watcher = None
+        self.follow_var = BooleanVar(value=False)
+        self.history = UndoHistory()
+        self._recording = True
+        self.thumbnail_cache = ThumbnailCache()
+        self.docx_images = []
+        self._shown_images = []
+        self.docx_image_source = None
+        self._image_refresh_pending = None
+        self._refresh_pending = None
+        self._bulk_edit_active = False
+        self._saved_fingerprint = None
+        self.minimap_model = MinimapModel()
+        self._minimap_redraw_pending = None
+        self._last_search_term = None
         self.autosave_enabled = False
         self.dark_mode = False
         self.available_fonts = font.families()
@@ -30,6 +1747,9 @@ class EnhancedWordPad:
         self.current_font_weight = "normal"
         self.current_font_slant = "roman"
         self.current_font_underline = False   
+        self.font_metrics = FontMetricsCache()
+        self.fonts = FontManager(self.root, self.default_font, self.current_font_size)
+        self._pending_font_update = None
         if not HAVE_DOCX:
             print("Warning: python-docx library not installed. Install with: pip install python-docx")
         
@@ -40,6 +1760,7 @@ class EnhancedWordPad:
         self.bind_shortcuts()      
         if self.autosave_enabled:
             self.root.after(300000, self.autosave)
+        self.root.after(WATCH_POLL_MS, self.check_external_changes)
         
     def create_menubar(self):
         menubar = Menu(self.root)
@@ -51,6 +1772,9 @@ class EnhancedWordPad:
         file_menu.add_command(label="Save As...", command=self.save_as, accelerator="Ctrl+Shift+S")
         file_menu.add_separator()
         file_menu.add_command(label="Preview Document...", command=self.preview_document)
+        file_menu.add_command(label="Compare With File...", command=self.compare_with_file)
+        file_menu.add_command(label="Export as PDF...", command=lambda: self.export_file("pdf"))
+        file_menu.add_command(label="Export as PostScript...", command=lambda: self.export_file("ps"))
         file_menu.add_command(label="Print...", command=self.print_file, accelerator="Ctrl+P")
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.exit_app, accelerator="Alt+F4")
@@ -58,6 +1782,7 @@ class EnhancedWordPad:
         edit_menu = Menu(menubar, tearoff=0)
         edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
         edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
+        edit_menu.add_command(label="Undo Memory Limit...", command=self.set_undo_limit)
         edit_menu.add_separator()
         edit_menu.add_command(label="Cut", command=self.cut, accelerator="Ctrl+X")
         edit_menu.add_command(label="Copy", command=self.copy, accelerator="Ctrl+C")
@@ -66,6 +1791,7 @@ class EnhancedWordPad:
         edit_menu.add_separator()
         edit_menu.add_command(label="Find...", command=self.find_text, accelerator="Ctrl+F")
         edit_menu.add_command(label="Replace...", command=self.replace_text, accelerator="Ctrl+H")
+        edit_menu.add_command(label="Find in Files...", command=self.find_in_files, accelerator="Ctrl+Shift+F")
         menubar.add_cascade(label="Edit", menu=edit_menu)   
         format_menu = Menu(menubar, tearoff=0)
         format_menu.add_command(label="Font...", command=self.choose_font)
@@ -78,6 +1804,8 @@ class EnhancedWordPad:
         view_menu = Menu(menubar, tearoff=0)
         view_menu.add_checkbutton(label="Toolbar", command=self.toggle_toolbar)
         view_menu.add_checkbutton(label="Status Bar", command=self.toggle_statusbar)
+        view_menu.add_checkbutton(label="Minimap", command=self.toggle_minimap)
+        view_menu.add_checkbutton(label="Follow File (tail)", variable=self.follow_var, command=self.toggle_follow)
         view_menu.add_separator()
         view_menu.add_command(label="Zoom In", command=self.zoom_in, accelerator="Ctrl++")
         view_menu.add_command(label="Zoom Out", command=self.zoom_out, accelerator="Ctrl+-")
@@ -168,14 +1896,22 @@ class EnhancedWordPad:
         main_frame.pack(fill=BOTH, expand=True)      
         self.line_numbers = Text(main_frame, width=4, padx=3, takefocus=0, border=0, background='lightgrey', state='disabled')
         self.line_numbers.pack(side=LEFT, fill=Y)      
+        self.minimap = Canvas(main_frame, width=MINIMAP_WIDTH, background='white',
+                              highlightthickness=0, takefocus=0, cursor="hand2")
+        self.minimap.pack(side=RIGHT, fill=Y)
+        self.minimap.bind('<Configure>', lambda e: self.schedule_minimap_redraw())
+        self.minimap.bind('<Button-1>', self.on_minimap_click)
+        self.minimap.bind('<B1-Motion>', self.on_minimap_click)
         # Set default font to Times New Roman if available, otherwise Arial
-        initial_font = (self.default_font, self.current_font_size)
-        self.text_area = Text(main_frame, wrap="word", undo=True, font=initial_font, selectbackground="lightblue")
+        self.text_area = Text(main_frame, wrap="word", undo=False, font=self.fonts.get(), selectbackground="lightblue")
+        self.install_edit_hook()
+        # The empty starting document counts as saved
+        self._saved_fingerprint = (0, self.buffer_digest())
         self.text_area.pack(side=LEFT, fill=BOTH, expand=True)      
-        y_scrollbar = Scrollbar(self.text_area)
-        y_scrollbar.pack(side=RIGHT, fill=Y)
-        self.text_area.config(yscrollcommand=y_scrollbar.set)
-        y_scrollbar.config(command=self.text_area.yview)      
+        self.y_scrollbar = Scrollbar(self.text_area)
+        self.y_scrollbar.pack(side=RIGHT, fill=Y)
+        self.text_area.config(yscrollcommand=self.on_text_scroll)
+        self.y_scrollbar.config(command=self.text_area.yview)      
         x_scrollbar = Scrollbar(main_frame, orient=HORIZONTAL)
         x_scrollbar.pack(side=BOTTOM, fill=X)
         self.text_area.config(xscrollcommand=x_scrollbar.set)
@@ -197,54 +1933,362 @@ class EnhancedWordPad:
         self.root.bind('<Control-Shift-S>', lambda e: self.save_as())
         self.root.bind('<Control-f>', lambda e: self.find_text())
         self.root.bind('<Control-h>', lambda e: self.replace_text())
+        self.root.bind('<Control-Shift-F>', lambda e: self.find_in_files())
         self.root.bind('<Control-a>', lambda e: self.select_all())
         self.root.bind('<Control-b>', lambda e: self.toggle_bold())
         self.root.bind('<Control-i>', lambda e: self.toggle_italic())
         self.root.bind('<Control-u>', lambda e: self.toggle_underline())
         self.root.bind('<Control-plus>', lambda e: self.zoom_in())
+        self.root.bind('<Control-equal>', lambda e: self.zoom_in())
         self.root.bind('<Control-minus>', lambda e: self.zoom_out())
         self.root.bind('<Control-0>', lambda e: self.reset_zoom())
+        self.text_area.bind('<<Paste>>', lambda e: self.paste() or "break")
+        self.text_area.bind('<<Cut>>', lambda e: self.cut() or "break")
+        self.text_area.bind('<<Undo>>', lambda e: self.undo() or "break")
+        self.text_area.bind('<<Redo>>', lambda e: self.redo() or "break")
+        self.text_area.bind('<<Modified>>', self.update_title)
+        self.text_area.bind('<Control-y>', lambda e: self.redo() or "break")
     
     def apply_current_font(self):
         """Apply the current font settings to the text area"""
-        font_elements = [self.current_font_family, self.current_font_size]
-        if self.current_font_weight == "bold":
-            font_elements.append("bold")
-        if self.current_font_slant == "italic":
-            font_elements.append("italic")
-        if self.current_font_underline:
-            font_elements.append("underline")
-        
-        font_tuple = tuple(font_elements)
-        self.text_area.config(font=font_tuple)
-        self.status_bar.config(text=f"Ready | Font: {self.current_font_family}, {self.current_font_size}pt | Line: 1, Column: 1")
-        self.font_size.delete(0, END)
-        self.font_size.insert(0, str(self.current_font_size))
+        if self._pending_font_update is not None:
+            self.root.after_cancel(self._pending_font_update)
+            self._pending_font_update = None
+        self.fonts.configure(family=self.current_font_family, size=self.current_font_size)
+        styled = self.fonts.get(self.current_font_weight, self.current_font_slant, self.current_font_underline)
+        # Only switch fonts on a style change; size/family updates propagate through the named font
+        if self.text_area.cget("font") != str(styled):
+            self.text_area.config(font=styled)
+        self.update_cursor_position()
+        if self.font_size.get() != str(self.current_font_size):
+            self.font_size.delete(0, END)
+            self.font_size.insert(0, str(self.current_font_size))
     
-    def new_file(self):
-        if self.check_unsaved_changes():
+    def schedule_font_update(self):
+        """Coalesce rapid zoom steps into a single font update"""
+        if self._pending_font_update is None:
+            self._pending_font_update = self.root.after(ZOOM_COALESCE_MS, self.apply_current_font)
+    
+    def install_edit_hook(self):
+        """Route the text widget's insert/delete commands through the undo history"""
+        widget = str(self.text_area)
+        self._text_command = widget + "_orig"
+        self.root.tk.call("rename", widget, self._text_command)
+        self.root.tk.createcommand(widget, self._dispatch_text_command)
+    
+    def _dispatch_text_command(self, *args):
+        call = self.root.tk.call
+        command = self._text_command
+        if not (args and args[0] in ("insert", "delete", "replace")):
+            return call((command,) + args)
+        if str(call(command, "cget", "-state")) == DISABLED:
+            return call((command,) + args)
+        
+        def resolve(index):
+            # Tk never edits past the final newline, so clamp "end" the same way
+            if call(command, "compare", index, ">=", "end"):
+                index = "end-1c"
+            return str(call(command, "index", index))
+        
+        if args[0] == "insert":
+            index = resolve(args[1])
+            result = call((command,) + args)
+            text = "".join(args[2::2])
+            if self._recording:
+                self.history.record("insert", index, text)
+            first_line = int(index.split('.')[0])
+            self.update_minimap_lines(first_line, first_line, first_line + text.count('\n'))
+            return result
+        if args[0] == "delete" and len(args) > 3:
+            # Multi-range deletes are not generated by PyPad; drop history rather than desync it
+            self.history.clear()
+            result = call((command,) + args)
+            self.update_minimap_lines(1, self.minimap_model.line_count,
+                                      int(self.text_area.index('end-1c').split('.')[0]))
+            return result
+        start = resolve(args[1])
+        stop = resolve(args[2]) if len(args) > 2 else resolve(f"{start}+1c")
+        removed = str(call(command, "get", start, stop)) if call(command, "compare", start, "<", stop) else ""
+        result = call((command,) + args)
+        inserted = "".join(args[3::2]) if args[0] == "replace" else ""
+        if self._recording:
+            self.history.record_replace(start, removed, inserted)
+        first_line = int(start.split('.')[0])
+        self.update_minimap_lines(first_line, int(stop.split('.')[0]), first_line + inserted.count('\n'))
+        return result
+    
+    def apply_edits(self, edits):
+        """Apply history edits directly to the widget without recording them"""
+        position = None
+        self._recording = False
+        try:
+            for kind, index, text in edits:
+                if kind == "insert":
+                    self.text_area.insert(index, text)
+                    position = index_after(index, text)
+                else:
+                    self.text_area.delete(index, index_after(index, text))
+                    position = index
+        finally:
+            self._recording = True
+        if position is not None:
+            self.text_area.mark_set(INSERT, position)
+            self.text_area.see(INSERT)
+        # Undoing back to the saved text clears the modified marker
+        self.is_dirty()
+        self.update_word_count()
+        self.update_cursor_position()
+    
+    def replace_buffer(self, content):
+        """Replace the whole buffer and start a fresh undo history"""
+        self.clear_docx_images()
+        self._recording = False
+        try:
             self.text_area.delete(1.0, END)
-            self.current_file = None
-            self.root.title("PyPad - New Document")
-            self.update_word_count()
+            self.text_area.insert(1.0, content)
+        finally:
+            self._recording = True
+        self.history.clear()
+        self.mark_clean()
+    
+    def buffer_char_count(self):
+        return int(self.text_area.tk.call(self.text_area, "count", "-chars", "1.0", "end-1c"))
+    
+    def buffer_digest(self):
+        """Digest the buffer a batch of lines at a time"""
+        digest = LineDigest()
+        lines = self.iter_document_lines()
+        while batch := list(itertools.islice(lines, STREAM_BATCH_LINES)):
+            digest.update(batch)
+        return digest.hexdigest()
+    
+    def mark_clean(self, digest=None):
+        """Record the buffer as matching the file on disk"""
+        self._saved_fingerprint = (self.buffer_char_count(), digest or self.buffer_digest())
+        self.text_area.edit_modified(False)
+        self.update_title()
+    
+    def is_dirty(self):
+        """Return whether the buffer differs from what was last loaded or saved
+
+        The widget's modified flag settles the common cases for free. Only a
+        set flag with an unchanged character count costs a pass over the
+        buffer, and a match clears the flag again.
+        """
+        if not self.text_area.edit_modified():
+            return False
+        saved = self._saved_fingerprint
+        if saved is None or self.buffer_char_count() != saved[0] or self.buffer_digest() != saved[1]:
+            return True
+        self.text_area.edit_modified(False)
+        return False
+    
+    def update_title(self, event=None):
+        name = os.path.basename(self.current_file) if self.current_file else "New Document"
+        marker = "*" if self.text_area.edit_modified() else ""
+        self.root.title(f"PyPad - {marker}{name}")
+    
+    def on_text_scroll(self, first, last):
+        self.y_scrollbar.set(first, last)
+        self.schedule_image_refresh()
+        self.draw_minimap_viewport()
+    
+    def update_minimap_lines(self, first_line, old_last_line, new_last_line):
+        """Refresh the minimap summary for the lines touched by an edit"""
+        lines = self.text_area.get(f"{first_line}.0", f"{new_last_line}.end").split('\n')
+        self.minimap_model.splice(first_line, old_last_line - first_line + 1, lines)
+        # Match flags for new lines are unknown until the next search
+        self._last_search_term = None
+        self.schedule_minimap_redraw()
+    
+    def schedule_minimap_redraw(self):
+        if self._minimap_redraw_pending is None:
+            self._minimap_redraw_pending = self.root.after(MINIMAP_REDRAW_MS, self.redraw_minimap)
+    
+    def redraw_minimap(self):
+        """Draw one density bar per pixel row; cost depends on canvas height, not line count"""
+        self._minimap_redraw_pending = None
+        if not self.minimap.winfo_ismapped():
+            return
+        height = self.minimap.winfo_height()
+        width = self.minimap.winfo_width() - 4
+        self.minimap.delete("density")
+        for row, (length, heading, match) in enumerate(self.minimap_model.rows(height)):
+            if heading:
+                self.minimap.create_line(0, row, width + 4, row, fill='royalblue', tags="density")
+            elif length:
+                bar = max(1, min(length, MINIMAP_MAX_COLUMNS) * width // MINIMAP_MAX_COLUMNS)
+                self.minimap.create_line(2, row, 2 + bar, row, fill='gray60', tags="density")
+            if match:
+                self.minimap.create_rectangle(width - 2, row - 1, width + 4, row + 1,
+                                              fill='orange', outline='', tags="density")
+        self.draw_minimap_viewport()
+    
+    def draw_minimap_viewport(self):
+        if not self.minimap.winfo_ismapped():
+            return
+        height = self.minimap.winfo_height()
+        first, last = self.text_area.yview()
+        rows = self.minimap_model.rows_used(height)
+        self.minimap.delete("viewport")
+        self.minimap.create_rectangle(0, int(first * rows), self.minimap.winfo_width() - 1,
+                                      max(int(first * rows) + 2, int(last * rows)),
+                                      outline='steelblue', tags="viewport")
+    
+    def on_minimap_click(self, event):
+        line = self.minimap_model.line_for_row(max(0, event.y), self.minimap.winfo_height())
+        self.text_area.see(f"{line}.0")
+        self.text_area.mark_set(INSERT, f"{line}.0")
+        self.update_cursor_position()
+    
+    def toggle_minimap(self):
+        if self.minimap.winfo_ismapped():
+            self.minimap.pack_forget()
+        else:
+            self.minimap.pack(side=RIGHT, fill=Y, before=self.text_area)
+            self.schedule_minimap_redraw()
+    
+    def mark_search_matches(self, term):
+        """Flag the lines containing term so they show up on the minimap"""
+        if term == self._last_search_term:
+            return
+        self._last_search_term = term
+        self.minimap_model.set_matches(
+            line_number for line_number, line in enumerate(self.iter_buffer_lines(), 1) if term in line)
+        self.schedule_minimap_redraw()
+    
+    def layout_docx_images(self, file_path):
+        """Reserve space under each image marker; thumbnails are decoded only once visible"""
+        self.docx_image_source = DocxImageSource(file_path)
+        count = IntVar()
+        index = self.text_area.search(IMAGE_MARKER_PATTERN, "1.0", stopindex=END, regexp=True, count=count)
+        while index:
+            end = f"{index}+{count.get()}c"
+            rel_id, width, height = re.match(IMAGE_MARKER_PATTERN, self.text_area.get(index, end)).groups()
+            size = thumbnail_size(int(width), int(height))
+            name = f"docx_image_{len(self.docx_images)}"
+            self.text_area.mark_set(name, index)
+            self.text_area.mark_gravity(name, LEFT)
+            self.text_area.tag_configure(name, spacing3=size[1] + 8)
+            self.text_area.tag_add(name, f"{index} linestart", f"{index} lineend")
+            self.docx_images.append({"name": name, "key": (file_path, rel_id), "size": size, "label": None})
+            index = self.text_area.search(IMAGE_MARKER_PATTERN, end, stopindex=END, regexp=True, count=count)
+        self.schedule_image_refresh()
+    
+    def clear_docx_images(self):
+        for image in self.docx_images:
+            if image["label"] is not None:
+                image["label"].destroy()
+            self.text_area.mark_unset(image["name"])
+            self.text_area.tag_delete(image["name"])
+        self.docx_images = []
+        self._shown_images = []
+        self.docx_image_source = None
+        self.thumbnail_cache.clear()
+    
+    def schedule_image_refresh(self):
+        if self.docx_images and self._image_refresh_pending is None:
+            self._image_refresh_pending = self.root.after_idle(self.refresh_docx_images)
+    
+    def image_index_for_line(self, line):
+        """Bisect docx_images, which stay in document order, for the first marker at or after line"""
+        low, high = 0, len(self.docx_images)
+        while low < high:
+            middle = (low + high) // 2
+            if int(self.text_area.index(self.docx_images[middle]["name"]).split('.')[0]) < line:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def refresh_docx_images(self):
+        """Place thumbnails for on-screen image markers and release the ones that left the view"""
+        self._image_refresh_pending = None
+        first_line = int(self.text_area.index("@0,0").split('.')[0])
+        last_line = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split('.')[0])
+        visible = self.docx_images[self.image_index_for_line(first_line):
+                                   self.image_index_for_line(last_line + 1)]
+        in_view = {id(image) for image in visible}
+        for image in self._shown_images:
+            if id(image) not in in_view and image["label"] is not None:
+                image["label"].destroy()
+                image["label"] = None
+        self._shown_images = []
+        for image in visible:
+            line_info = self.text_area.dlineinfo(f"{image['name']} lineend")
+            if line_info is None:
+                if image["label"] is not None:
+                    image["label"].destroy()
+                    image["label"] = None
+                continue
+            x, y, _, height, _ = line_info
+            if image["label"] is None:
+                image["label"] = self.create_image_label(image)
+            image["label"].place(x=x, y=y + height - image["size"][1] - 4)
+            self._shown_images.append(image)
+    
+    def create_image_label(self, image):
+        photo = self.thumbnail_cache.get(image["key"])
+        if photo is None:
+            try:
+                data = self.docx_image_source.read(image["key"][1])
+            except (KeyError, OSError, zipfile.BadZipFile, ET.ParseError):
+                data = None
+            photo = decode_thumbnail(data, *image["size"], master=self.root) if data else None
+            if photo is None:
+                return Label(self.text_area, text="[Image could not be displayed]", bg='lightgrey')
+            self.thumbnail_cache.put(image["key"], photo)
+        label = Label(self.text_area, image=photo, bd=0, cursor="arrow")
+        # Keep the image alive while shown, even if the cache evicts it
+        label.image = photo
+        return label
+    
+    def set_undo_limit(self):
+        limit = simpledialog.askinteger("Undo Memory Limit", "Maximum undo memory (MB):",
+                                        initialvalue=self.history.max_bytes // (1024 * 1024),
+                                        minvalue=1, maxvalue=4096, parent=self.root)
+        if limit:
+            self.history.set_limit(limit * 1024 * 1024)
+            self.update_cursor_position()
+    
+    def new_file(self):
+        self.check_unsaved_changes(self.start_new_document)
+    
+    def start_new_document(self):
+        self.replace_buffer("")
+        self.current_file = None
+        self.current_compression = None
+        self.watch_file(None)
+        self.update_title()
+        self.update_word_count()
     
     def open_file(self):
-        if self.check_unsaved_changes():
-            file_path = filedialog.askopenfilename(
-                filetypes=[
-                    ("Text files", "*.txt"),
-                    ("Python files", "*.py"),
-                    ("HTML files", "*.html;*.htm"),
-                    ("Word documents", "*.docx"),
-                    ("All files", "*.*")
-                ]
-            )
-            if file_path:
-                self.load_file(file_path)
-    
-    def load_file(self, file_path):
-        """Enhanced file loading with better .docx support"""
+        self.check_unsaved_changes(self.choose_file_to_open)
+    
+    def choose_file_to_open(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[
+                ("Text files", "*.txt"),
+                ("Python files", "*.py"),
+                ("HTML files", "*.html;*.htm"),
+                ("Word documents", "*.docx"),
+                ("Compressed files", "*.gz;*.bz2;*.xz"),
+                ("All files", "*.*")
+            ]
+        )
+        if file_path:
+            self.load_file(file_path)
+    
+    def load_file(self, file_path, on_loaded=None):
+        """Enhanced file loading with better .docx support
+
+        on_loaded() runs once the buffer holds the whole document, which for
+        HTML and compressed files is after their streamed load completes.
+        """
+        if self.bulk_edit_busy():
+            return
         try:
+            self.current_compression = None
             if file_path.lower().endswith('.docx'):
                 if not HAVE_DOCX:
                     messagebox.showerror("Error", 
@@ -254,38 +2298,198 @@ class EnhancedWordPad:
                 
                 # Enhanced .docx loading with formatting markers
                 content = self.load_docx_with_formatting(file_path)
-                self.text_area.delete(1.0, END)
-                self.text_area.insert(1.0, content)
+                self.replace_buffer(content)
+                self.layout_docx_images(file_path)
                 
-            else:
-                # Try different encodings for text files
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'utf-16']
-                content = None
+            elif file_path.lower().endswith(('.html', '.htm')):
+                self.current_encoding = detect_text_encoding(file_path)
+                self.load_streamed(file_path, lambda sink, cancelled, progress:
+                                   import_html(file_path, sink, cancelled, progress), "Importing HTML",
+                                   on_loaded)
                 
-                for encoding in encodings:
-                    try:
-                        with open(file_path, 'r', encoding=encoding) as file:
-                            content = file.read()
-                        break
-                    except UnicodeDecodeError:
-                        continue
+            elif (codec := detect_compression(file_path)) and can_decompress(file_path, codec):
+                self.current_compression = codec
                 
-                if content is None:
-                    # If all encodings fail, try binary mode as last resort
-                    with open(file_path, 'rb') as file:
-                        content = file.read().decode('utf-8', errors='replace')
+                def read_compressed(sink, cancelled, progress):
+                    self.current_encoding = read_text_stream(file_path, sink, progress, cancelled) or 'utf-8'
                 
-                self.text_area.delete(1.0, END)
-                self.text_area.insert(1.0, content)
+                self.load_streamed(file_path, read_compressed, "Decompressing", on_loaded)
+                
+            else:
+                # Try different encodings for text files
+                content, self.current_encoding = read_text_file(file_path)
+                self.replace_buffer(content)
             
             self.current_file = file_path
-            self.root.title(f"PyPad - {os.path.basename(file_path)}")
+            self.watch_file(file_path)
+            self.update_title()
             self.update_word_count()
+            if on_loaded is not None and not self._bulk_edit_active:
+                on_loaded()
             
         except Exception as e:
             messagebox.showerror("Error", f"Could not open file: {str(e)}")
     
-    def load_docx_with_formatting(self, file_path):
+    def load_streamed(self, file_path, producer, label, on_loaded=None):
+        """Run producer(sink, cancelled, progress) on a worker thread, inserting its text as it arrives"""
+        self.replace_buffer("")
+        chunks = queue.Queue(maxsize=STREAM_QUEUE_DEPTH)
+        cancelled = threading.Event()
+        position = {"done": 0, "total": 0}
+        
+        def progress(done, total):
+            position["done"], position["total"] = done, total
+        
+        def worker():
+            try:
+                producer(chunks.put, cancelled, progress)
+            except Exception as e:
+                chunks.put(e)
+            chunks.put(None)
+        
+        def finish(error=None):
+            self.root.unbind('<Escape>')
+            self._bulk_edit_active = False
+            self.text_area.config(state=NORMAL)
+            if cancelled.is_set() or error is not None:
+                # Never leave a partial document attached to the file it came from
+                self.replace_buffer("")
+                self.current_file = None
+                self.watch_file(None)
+                self.update_title()
+            else:
+                self.mark_clean()
+            self.history.clear()
+            self.schedule_refresh()
+            if error is not None:
+                messagebox.showerror("Error", f"Could not open file: {str(error)}")
+            elif cancelled.is_set():
+                self.status_bar.config(text=f"Cancelled opening {os.path.basename(file_path)}")
+            else:
+                self.status_bar.config(text=f"Opened {os.path.basename(file_path)}")
+                if on_loaded is not None:
+                    on_loaded()
+        
+        def drain():
+            deadline = time.perf_counter() + PASTE_SLICE_SECONDS
+            self._recording = False
+            self.text_area.config(state=NORMAL)
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        item = chunks.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None or isinstance(item, Exception):
+                        self._recording = True
+                        finish(item)
+                        return
+                    # After a cancel keep draining so the worker is never blocked on put()
+                    if not cancelled.is_set():
+                        self.text_area.insert("end-1c", item)
+            finally:
+                self._recording = True
+                # Loaded text is not an edit; keep the buffer clean while it streams in
+                self.text_area.edit_modified(False)
+                if self._bulk_edit_active:
+                    self.text_area.config(state=DISABLED)
+            percent = 100 * position["done"] // position["total"] if position["total"] else 0
+            self.status_bar.config(text=f"{label}... {percent}% (Esc to cancel)")
+            self.root.after(10, drain)
+        
+        self._bulk_edit_active = True
+        self.root.bind('<Escape>', lambda e: cancelled.set())
+        threading.Thread(target=worker, daemon=True).start()
+        # Let load_file attach the file name before a short document can finish
+        self.root.after_idle(drain)
+    
+    def save_streamed(self, file_path, make_writer, codec=None, on_saved=None):
+        """Stream the buffer to file_path; lines are read here and written by a worker thread
+
+        Output goes to a temporary file that replaces file_path only once
+        the write completes, so a cancelled or failed save leaves the old
+        file intact. Symlinks are followed and the target keeps its mode;
+        a file with other hard links is overwritten in place instead.
+        """
+        batches = queue.Queue(maxsize=STREAM_QUEUE_DEPTH)
+        cancelled = threading.Event()
+        errors = []
+        digest = LineDigest()
+        lines = self.iter_document_lines()
+        last_line = int(self.text_area.index('end-1c').split('.')[0])
+        target_path = os.path.realpath(file_path)
+        temp_path = f"{target_path}.pypad-tmp"
+        
+        def writer():
+            try:
+                with open_text_output(temp_path, codec) as stream:
+                    export_writer = make_writer(stream)
+                    export_writer.begin()
+                    while (batch := batches.get()) is not None:
+                        export_writer.write_lines(batch)
+                    export_writer.finish()
+                if cancelled.is_set():
+                    os.remove(temp_path)
+                elif not os.path.exists(target_path):
+                    os.replace(temp_path, target_path)
+                elif os.stat(target_path).st_nlink > 1:
+                    # Renaming would split the file from its other links
+                    shutil.copyfile(temp_path, target_path)
+                    os.remove(temp_path)
+                else:
+                    shutil.copymode(target_path, temp_path)
+                    os.replace(temp_path, target_path)
+            except Exception as e:
+                errors.append(e)
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        
+        def finish():
+            self.root.unbind('<Escape>')
+            self._bulk_edit_active = False
+            self.text_area.config(state=NORMAL)
+            if errors:
+                messagebox.showerror("Error", f"Could not save file: {str(errors[0])}")
+            elif cancelled.is_set():
+                self.status_bar.config(text="Save cancelled")
+            else:
+                self.status_bar.config(text="File saved successfully")
+                if file_path == self.current_file:
+                    self.watch_file(file_path)
+                    self.mark_clean(digest.hexdigest())
+                if on_saved is not None:
+                    on_saved()
+        
+        def pump():
+            # Keep the buffer locked so the output is a consistent snapshot
+            sent = 0
+            while not batches.full() and thread.is_alive():
+                batch = [] if cancelled.is_set() else list(itertools.islice(lines, STREAM_BATCH_LINES))
+                if not batch:
+                    batches.put(None)
+                    thread.join()
+                    finish()
+                    return
+                batches.put(batch)
+                digest.update(batch)
+                sent += len(batch)
+            if not thread.is_alive():
+                finish()
+                return
+            pump.lines_sent += sent
+            self.status_bar.config(text=f"Saving... {100 * pump.lines_sent // last_line}% (Esc to cancel)")
+            self.root.after(1, pump)
+        
+        pump.lines_sent = 0
+        self._bulk_edit_active = True
+        self.text_area.config(state=DISABLED)
+        self.root.bind('<Escape>', lambda e: cancelled.set())
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        pump()
+    
+    @staticmethod
+    def load_docx_with_formatting(file_path):
         """Enhanced .docx loader with formatting markers and content extraction"""
         try:
             doc = Document(file_path)
@@ -310,9 +2514,15 @@ class EnhancedWordPad:
                 content_lines.append("")
             
             # Process paragraphs with formatting
+            image_count = 0
             for i, paragraph in enumerate(doc.paragraphs):
+                # Embedded images become markers that the editor renders lazily
+                image_markers = [docx_image_marker(*image) for image in docx_paragraph_images(paragraph)]
+                image_count += len(image_markers)
                 if not paragraph.text.strip():
-                    if paragraph.runs:  # Empty paragraph with formatting
+                    if image_markers:
+                        content_lines.extend(image_markers)
+                    elif paragraph.runs:  # Empty paragraph with formatting
                         content_lines.append("[Empty paragraph]")
                     continue
                 
@@ -327,6 +2537,7 @@ class EnhancedWordPad:
                     elif 'Heading 3' in style_name:
                         heading_level = 3
                     content_lines.append(f"\n{'#' * heading_level} {paragraph.text}")
+                    content_lines.extend(image_markers)
                     continue
                 
                 # Process runs in paragraph
@@ -360,6 +2571,7 @@ class EnhancedWordPad:
                 
                 if line_text.strip():
                     content_lines.append(line_text)
+                content_lines.extend(image_markers)
             
             # Process tables
             if doc.tables:
@@ -412,7 +2624,7 @@ class EnhancedWordPad:
                                 inline_shapes.append(inline)
                 
                 if inline_shapes:
-                    content_lines.append(f"Images/Objects: {len(inline_shapes)} (not displayed in text view)")
+                    content_lines.append(f"Images/Objects: {len(inline_shapes)} ({image_count} images shown inline)")
             except:
                 content_lines.append("Images/Objects: (unable to detect)")
             
@@ -517,13 +2729,23 @@ class EnhancedWordPad:
         except Exception as e:
             messagebox.showerror("Preview Error", f"Could not generate preview: {str(e)}")
     
-    def save_file(self):
+    def save_file(self, on_saved=None):
+        """Save to the current file, or ask for a name; on_saved() runs once the file is written"""
+        if self.bulk_edit_busy():
+            return
         if self.current_file:
-            self.save_to_file(self.current_file)
+            if not self.is_dirty() and os.path.exists(self.current_file):
+                self.status_bar.config(text="No changes to save")
+                if on_saved is not None:
+                    on_saved()
+                return
+            self.save_to_file(self.current_file, on_saved)
         else:
-            self.save_as()
+            self.save_as(on_saved)
     
-    def save_as(self):
+    def save_as(self, on_saved=None):
+        if self.bulk_edit_busy():
+            return
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
             filetypes=[
@@ -531,18 +2753,39 @@ class EnhancedWordPad:
                 ("Python files", "*.py"),
                 ("HTML files", "*.html"),
                 ("Word documents", "*.docx"),
+                ("Compressed text", "*.gz;*.bz2;*.xz"),
                 ("All files", "*.*")
             ]
         )
         if file_path:
+            if file_path != self.current_file:
+                # A new name picks its compression from the extension alone
+                self.current_compression = None
             self.current_file = file_path
-            self.save_to_file(file_path)
-            self.root.title(f"PyPad - {os.path.basename(file_path)}")
+            self.save_to_file(file_path, on_saved)
+            self.update_title()
     
-    def save_to_file(self, file_path):
+    def save_to_file(self, file_path, on_saved=None):
         """Save content to a file based on its extension"""
         try:
-            content = self.text_area.get(1.0, END)
+            # Streamed out by a writer thread, which reports completion itself
+            codec = detect_compression(file_path, sniff=False)
+            if file_path == self.current_file and self.current_compression:
+                # Files recognised by magic bytes keep their codec whatever the extension
+                codec = self.current_compression
+            if file_path.lower().endswith(('.html', '.htm')):
+                title = os.path.splitext(os.path.basename(file_path))[0]
+                self.save_streamed(file_path, lambda stream: HtmlExportWriter(
+                    stream, title, self.current_font_family, self.current_font_size), on_saved=on_saved)
+                return
+            if codec:
+                self.save_streamed(file_path, TextExportWriter, codec, on_saved)
+                return
+            
+            if self.docx_images:
+                content = "\n".join(self.iter_document_lines()) + "\n"
+            else:
+                content = self.text_area.get(1.0, END)
             
             if file_path.lower().endswith('.docx'):
                 if HAVE_DOCX:
@@ -585,53 +2828,348 @@ class EnhancedWordPad:
                         file.write(content)
             
             self.status_bar.config(text="File saved successfully")
+            if file_path == self.current_file:
+                self.watch_file(file_path)
+                self.mark_clean()
+            if on_saved is not None:
+                on_saved()
             
         except Exception as e:
             messagebox.showerror("Error", f"Could not save file: {str(e)}")
     
+    def watch_file(self, file_path):
+        """Start tracking file_path for external changes (None stops watching)"""
+        if self.file_watcher is not None:
+            self.file_watcher.close()
+            self.file_watcher = None
+        self._follow_decoder = None
+        if file_path and not file_path.lower().endswith('.docx') and not detect_compression(file_path):
+            self.file_watcher = FileWatcher(file_path)
+            # Translate CRLF/CR like the universal-newline load did, even when split across reads
+            self._follow_decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(self.current_encoding)(errors='replace'), translate=True)
+    
+    def check_external_changes(self):
+        watcher = self.file_watcher
+        delay = WATCH_POLL_MS
+        if self._bulk_edit_active:
+            # Leave the change pending until the buffer is free to reload
+            self.root.after(delay, self.check_external_changes)
+            return
+        try:
+            change = watcher.poll() if watcher is not None else None
+            if change == "appended" and self.follow_var.get():
+                change = None
+            if self.follow_var.get() and watcher is not None and watcher.pending():
+                self.append_followed_data()
+                # More data is waiting; keep draining without the full poll delay
+                delay = 10 if watcher.pending() else WATCH_POLL_MS
+            if change == "deleted":
+                self.status_bar.config(text=f"{os.path.basename(watcher.path)} was deleted on disk")
+            elif change in ("appended", "modified"):
+                # Following reloads truncated or rotated files unasked, unless that would lose edits
+                dirty = self.is_dirty()
+                question = ("Reload it and discard your unsaved changes?" if dirty else "Reload it?")
+                if (self.follow_var.get() and not dirty) or messagebox.askyesno(
+                        "File Changed",
+                        f"{os.path.basename(watcher.path)} has changed on disk.\n{question}"):
+                    self.load_file(watcher.path)
+                else:
+                    watcher.snapshot()
+                    # The user kept their version, so it no longer matches the file on disk
+                    self._saved_fingerprint = None
+                    self.text_area.edit_modified(True)
+        except OSError as e:
+            self.status_bar.config(text=f"Could not check file for changes: {str(e)}")
+        self.root.after(delay, self.check_external_changes)
+    
+    def append_followed_data(self):
+        """Append newly written bytes to the buffer, keeping at most FOLLOW_MAX_LINES lines"""
+        text = self._follow_decoder.decode(self.file_watcher.read_appended())
+        if not text:
+            return
+        at_bottom = self.text_area.yview()[1] >= 1.0
+        modified = self.text_area.edit_modified()
+        self._recording = False
+        try:
+            self.text_area.insert("end-1c", text)
+            line_count = int(self.text_area.index('end-1c').split('.')[0])
+            excess = line_count - FOLLOW_MAX_LINES
+            if excess > 0:
+                self.text_area.delete("1.0", f"{excess + 1}.0")
+                # Trimming the top shifts every index the history refers to
+                self.history.clear()
+        finally:
+            self._recording = True
+        # The buffer still mirrors the file, but the saved fingerprint no longer
+        # describes it; without one any later edit counts as unsaved
+        self._saved_fingerprint = None
+        self.text_area.edit_modified(modified)
+        if at_bottom:
+            self.text_area.see("end")
+        self.status_bar.config(text=f"Following {os.path.basename(self.file_watcher.path)}: "
+                                    f"{format_size(self.file_watcher.size)}")
+    
+    def toggle_follow(self):
+        if self.follow_var.get() and self.file_watcher is None:
+            messagebox.showinfo("Follow File", "Open a text file to follow it.")
+            self.follow_var.set(False)
+        elif self.follow_var.get():
+            self.text_area.see("end")
+    
+    def iter_buffer_lines(self, chunk_lines=1000):
+        """Yield buffer lines a chunk at a time instead of copying the whole document"""
+        last_line = int(self.text_area.index('end-1c').split('.')[0])
+        for start in range(1, last_line + 1, chunk_lines):
+            stop = min(start + chunk_lines, last_line + 1)
+            yield from self.text_area.get(f"{start}.0", f"{stop - 1}.end").split('\n')
+    
+    def iter_document_lines(self):
+        """Buffer lines as saved or exported; .docx image markers are display-only"""
+        lines = self.iter_buffer_lines()
+        if not self.docx_images:
+            return lines
+        return (line for line in lines if not IMAGE_MARKER_LINE.fullmatch(line.strip()))
+    
+    def export_to_stream(self, stream, fmt):
+        """Export the buffer with the current font, reporting progress in the status bar"""
+        def progress(pages):
+            if pages % 50 == 0:
+                self.status_bar.config(text=f"Exporting... {pages} pages")
+                self.root.update_idletasks()
+        
+        return export_document(self.iter_document_lines(), stream, fmt,
+                               self.current_font_family, self.current_font_size,
+                               bold=self.current_font_weight == "bold",
+                               italic=self.current_font_slant == "italic",
+                               metrics=self.font_metrics, progress=progress)
+    
+    def export_file(self, fmt):
+        extension, label = (".pdf", "PDF documents") if fmt == "pdf" else (".ps", "PostScript files")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=[(label, f"*{extension}"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'wb') as stream:
+                pages = self.export_to_stream(stream, fmt)
+            self.status_bar.config(text=f"Exported {pages} pages to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not export file: {str(e)}")
+    
     def print_file(self):
-        if platform.system() == "Windows":
-            content = self.text_area.get(1.0, END)
-            temp_file = "temp_print.txt"
-            try:
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
+        try:
+            if platform.system() == "Windows":
+                fd, temp_file = tempfile.mkstemp(suffix=".txt", prefix="pypad_print_")
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(self.text_area.get(1.0, END))
                 os.startfile(temp_file, "print")
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not print: {str(e)}")
-        else:
-            messagebox.showinfo("Print", "Print functionality is limited on this platform")
-    
-    def check_unsaved_changes(self):
-        content = self.text_area.get(1.0, END).strip()
-        if content and self.current_file is None:
-            response = messagebox.askyesnocancel("Save Changes", "Do you want to save changes?")
-            if response is None:
-                return False
-            elif response:
-                self.save_as()
-        return True
+                # startfile returns before the print verb has read the file; remove it once spooled
+                self.root.after(PRINT_TEMP_LIFETIME_MS, self.remove_print_file, temp_file)
+            elif shutil.which("lpr"):
+                # Stream paginated PostScript straight into the print spooler
+                lpr = subprocess.Popen(["lpr"], stdin=subprocess.PIPE)
+                pages = self.export_to_stream(lpr.stdin, "ps")
+                lpr.stdin.close()
+                if lpr.wait() != 0:
+                    raise OSError(f"lpr exited with status {lpr.returncode}")
+                self.status_bar.config(text=f"Sent {pages} pages to the printer")
+            else:
+                messagebox.showinfo("Print", "No print spooler found. Use File > Export as PDF... instead.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not print: {str(e)}")
     
-    def undo(self):
+    def remove_print_file(self, path, attempts=5):
+        """Delete a spooled print file, retrying while the print handler still holds it"""
         try:
-            self.text_area.edit_undo()
-        except:
+            os.remove(path)
+        except FileNotFoundError:
             pass
+        except OSError:
+            if attempts > 1:
+                self.root.after(PRINT_TEMP_LIFETIME_MS, self.remove_print_file, path, attempts - 1)
+    
+    def check_unsaved_changes(self, then):
+        """Run then() once a modified buffer is saved or the user chooses to discard it
+
+        Streamed saves complete later, so then() is passed along as their
+        completion callback; a cancelled or failed save never calls it.
+        """
+        if self.bulk_edit_busy():
+            return
+        if not self.is_dirty():
+            then()
+            return
+        name = os.path.basename(self.current_file) if self.current_file else "New Document"
+        response = messagebox.askyesnocancel("Save Changes", f"Do you want to save changes to {name}?")
+        if response is None:
+            return
+        elif not response:
+            then()
+            return
+        self.save_file(on_saved=then)
+    
+    def undo(self):
+        if self._bulk_edit_active:
+            return
+        step = self.history.pop_undo()
+        if step is not None:
+            self.apply_edits(step.inverse())
     
     def redo(self):
-        try:
-            self.text_area.edit_redo()
-        except:
-            pass
+        if self._bulk_edit_active:
+            return
+        step = self.history.pop_redo()
+        if step is not None:
+            self.apply_edits(step.edits())
     
     def cut(self):
-        self.text_area.event_generate("<<Cut>>")
+        if self._bulk_edit_active or not self.text_area.tag_ranges(SEL):
+            return
+        self.text_area.event_generate("<<Copy>>")
+        start, end = self.text_area.index(SEL_FIRST), self.text_area.index(SEL_LAST)
+        total_lines = int(end.split('.')[0]) - int(start.split('.')[0])
+        if total_lines < CUT_CHUNK_LINES:
+            self.text_area.delete(start, end)
+            self.schedule_refresh()
+            return
+        # Delete large selections from the end backwards, a slice of lines at a time
+        self.begin_bulk_edit()
+        self.text_area.mark_set("cut_start", start)
+        self.text_area.mark_gravity("cut_start", LEFT)
+        self.text_area.mark_set("cut_end", end)
+        
+        def step():
+            deadline = time.perf_counter() + PASTE_SLICE_SECONDS
+            self.text_area.config(state=NORMAL)
+            while time.perf_counter() < deadline:
+                chunk_start = self.text_area.index(f"cut_end linestart -{CUT_CHUNK_LINES} lines")
+                if self.text_area.compare(chunk_start, "<=", "cut_start"):
+                    self.text_area.delete("cut_start", "cut_end")
+                    self.text_area.mark_unset("cut_start", "cut_end")
+                    self.end_bulk_edit()
+                    return
+                self.text_area.delete(chunk_start, "cut_end")
+            self.text_area.config(state=DISABLED)
+            remaining = int(self.text_area.index("cut_end").split('.')[0]) - int(start.split('.')[0])
+            self.status_bar.config(text=f"Cutting... {100 - 100 * remaining // total_lines}%")
+            self.root.after(1, step)
+        
+        step()
     
     def copy(self):
         self.text_area.event_generate("<<Copy>>")
     
     def paste(self):
-        self.text_area.event_generate("<<Paste>>")
+        if self._bulk_edit_active:
+            return
+        try:
+            text = self.root.clipboard_get()
+        except TclError:
+            return
+        if len(text) > PASTE_VIEWER_THRESHOLD:
+            response = messagebox.askyesnocancel(
+                "Large Clipboard",
+                f"The clipboard holds {format_size(len(text))} of text.\n"
+                "Open it in a read-only viewer instead of pasting?")
+            if response is None:
+                return
+            if response:
+                self.open_clipboard_viewer(text)
+                return
+        if len(text) < PASTE_CHUNK_THRESHOLD:
+            with self.history.group():
+                if self.text_area.tag_ranges(SEL):
+                    self.text_area.delete(SEL_FIRST, SEL_LAST)
+                self.text_area.insert(INSERT, text)
+            self.text_area.see(INSERT)
+            self.schedule_refresh()
+            return
+        self.begin_bulk_edit()
+        if self.text_area.tag_ranges(SEL):
+            self.text_area.delete(SEL_FIRST, SEL_LAST)
+        self.insert_chunked(self.text_area, INSERT, text, on_done=self.end_bulk_edit)
+    
+    def bulk_edit_busy(self):
+        """Report whether a streamed load/save or chunked edit owns the buffer
+
+        The widget stays disabled between slices, so anything that replaces
+        the buffer or switches files now would be silently ignored by Tk
+        while the transfer carried on under the new name.
+        """
+        if not self._bulk_edit_active:
+            return False
+        self.status_bar.config(text="Please wait for the current operation to finish (Esc cancels loads and saves)")
+        self.root.bell()
+        return True
+    
+    def begin_bulk_edit(self):
+        """Group a time-sliced edit into one undo step and block typing until it ends"""
+        self._bulk_edit_active = True
+        self.history.begin_group()
+    
+    def end_bulk_edit(self):
+        self.text_area.config(state=NORMAL)
+        self.history.end_group()
+        self._bulk_edit_active = False
+        self.text_area.see(INSERT)
+        self.schedule_refresh()
+    
+    def insert_chunked(self, widget, index, text, on_done=None, label="Pasting"):
+        """Insert text a slice at a time via after() so the event loop keeps running"""
+        widget.mark_set("chunk_insert", index)
+        widget.mark_gravity("chunk_insert", RIGHT)
+        final_state = widget.cget("state")
+        position = [0]
+        
+        def step():
+            if not widget.winfo_exists():
+                return
+            deadline = time.perf_counter() + PASTE_SLICE_SECONDS
+            widget.config(state=NORMAL)
+            offset = position[0]
+            while offset < len(text) and time.perf_counter() < deadline:
+                widget.insert("chunk_insert", text[offset:offset + PASTE_CHUNK_SIZE])
+                offset += PASTE_CHUNK_SIZE
+            position[0] = offset
+            # Disabled between slices so keystrokes cannot land mid-paste
+            widget.config(state=DISABLED)
+            if offset < len(text):
+                self.status_bar.config(text=f"{label}... {100 * offset // len(text)}%")
+                self.root.after(1, step)
+                return
+            widget.config(state=final_state)
+            widget.mark_set(INSERT, "chunk_insert")
+            widget.mark_unset("chunk_insert")
+            self.status_bar.config(text=f"Inserted {format_size(len(text))} of text")
+            if on_done:
+                on_done()
+        
+        step()
+    
+    def open_clipboard_viewer(self, text):
+        viewer = Toplevel(self.root)
+        viewer.title("Clipboard Contents (read-only)")
+        viewer.geometry("800x600")
+        viewer_text = Text(viewer, wrap="none", font=self.fonts.get(), state=DISABLED)
+        scrollbar = Scrollbar(viewer, command=viewer_text.yview)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        viewer_text.config(yscrollcommand=scrollbar.set)
+        viewer_text.pack(fill=BOTH, expand=True)
+        self.insert_chunked(viewer_text, "1.0", text)
+    
+    def schedule_refresh(self):
+        """Coalesce word count, cursor and line number updates into one idle callback"""
+        if self._refresh_pending is None:
+            self._refresh_pending = self.root.after_idle(self._refresh_counters)
+    
+    def _refresh_counters(self):
+        self._refresh_pending = None
+        self.update_word_count()
+        self.update_line_numbers()
+        self.update_cursor_position()
     
     def select_all(self):
         self.text_area.tag_add(SEL, "1.0", END)
@@ -650,6 +3188,7 @@ class EnhancedWordPad:
         def find_next():
             text_to_find = find_entry.get()
             if text_to_find:
+                self.mark_search_matches(text_to_find)
                 start_pos = self.text_area.search(text_to_find, INSERT, END)
                 if start_pos:
                     end_pos = f"{start_pos}+{len(text_to_find)}c"
@@ -679,13 +3218,293 @@ class EnhancedWordPad:
             find_text = find_entry.get()
             replace_text = replace_entry.get()
             if find_text:
-                content = self.text_area.get(1.0, END)
+                content = self.text_area.get(1.0, "end-1c")
                 new_content = content.replace(find_text, replace_text)
-                self.text_area.delete(1.0, END)
-                self.text_area.insert(1.0, new_content)
+                if new_content != content:
+                    # One undo step holding the compressed before/after text
+                    with self.history.group():
+                        self.text_area.delete(1.0, END)
+                        self.text_area.insert(1.0, new_content)
+                    self.update_word_count()
         
         Button(replace_window, text="Replace All", command=replace_all).pack(pady=10)
     
+    def find_in_files(self):
+        search_window = Toplevel(self.root)
+        search_window.title("Find in Files")
+        search_window.geometry("700x450")
+        
+        form = Frame(search_window)
+        form.pack(fill=X, padx=10, pady=5)
+        Label(form, text="Find:").grid(row=0, column=0, sticky=W)
+        find_entry = Entry(form, width=50)
+        find_entry.grid(row=0, column=1, sticky=EW, pady=2)
+        Label(form, text="Directory:").grid(row=1, column=0, sticky=W)
+        dir_entry = Entry(form, width=50)
+        dir_entry.insert(0, os.path.dirname(self.current_file) if self.current_file else os.getcwd())
+        dir_entry.grid(row=1, column=1, sticky=EW, pady=2)
+        
+        def browse():
+            directory = filedialog.askdirectory(parent=search_window, initialdir=dir_entry.get())
+            if directory:
+                dir_entry.delete(0, END)
+                dir_entry.insert(0, directory)
+        
+        Button(form, text="Browse...", command=browse).grid(row=1, column=2, padx=5)
+        Label(form, text="Include:").grid(row=2, column=0, sticky=W)
+        include_entry = Entry(form, width=50)
+        include_entry.insert(0, "*.txt; *.py; *.html; *.htm; *.docx")
+        include_entry.grid(row=2, column=1, sticky=EW, pady=2)
+        Label(form, text="Exclude:").grid(row=3, column=0, sticky=W)
+        exclude_entry = Entry(form, width=50)
+        exclude_entry.insert(0, ".git; __pycache__; node_modules")
+        exclude_entry.grid(row=3, column=1, sticky=EW, pady=2)
+        match_case_var = IntVar(value=0)
+        Checkbutton(form, text="Match case", variable=match_case_var).grid(row=4, column=1, sticky=W)
+        form.columnconfigure(1, weight=1)
+        
+        list_frame = Frame(search_window)
+        list_frame.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        scrollbar = Scrollbar(list_frame)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        results_list = Listbox(list_frame, yscrollcommand=scrollbar.set)
+        results_list.pack(side=LEFT, fill=BOTH, expand=True)
+        scrollbar.config(command=results_list.yview)
+        status_label = Label(search_window, text="Ready", anchor=W)
+        status_label.pack(fill=X, padx=10)
+        
+        locations = []
+        state = {"search": None}
+        
+        def poll():
+            search = state["search"]
+            if search is None:
+                return
+            finished = False
+            # Drain a bounded number of hits per tick to keep the dialog responsive
+            for _ in range(500):
+                try:
+                    item = search.results.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                path, hits = item
+                for line_number, text in hits:
+                    locations.append((path, line_number))
+                    results_list.insert(END, f"{os.path.relpath(path, search.root_dir)}:{line_number}: {text}")
+            verb = "Cancelled" if search.cancelled.is_set() else "Done" if finished else "Searching"
+            status_label.config(text=f"{verb} | {search.files_scanned} files scanned, "
+                                     f"{search.files_per_second:.0f} files/s | {len(locations)} matches")
+            if not finished and search_window.winfo_exists():
+                search_window.after(100, poll)
+        
+        def start_search():
+            needle = find_entry.get()
+            if not needle or not os.path.isdir(dir_entry.get()):
+                messagebox.showinfo("Find in Files", "Enter text to find and an existing directory.",
+                                    parent=search_window)
+                return
+            cancel_search()
+            results_list.delete(0, END)
+            locations.clear()
+            search = FindInFilesSearch(dir_entry.get(), needle, match_case=bool(match_case_var.get()),
+                                       include=include_entry.get(), exclude=exclude_entry.get())
+            state["search"] = search
+            search.start()
+            poll()
+        
+        def cancel_search():
+            if state["search"] is not None:
+                state["search"].cancel()
+        
+        def open_result(event=None):
+            selection = results_list.curselection()
+            if not selection:
+                return
+            path, line_number = locations[selection[0]]
+            
+            def show_hit():
+                self.text_area.mark_set(INSERT, f"{line_number}.0")
+                self.text_area.see(INSERT)
+                self.update_cursor_position()
+            
+            self.check_unsaved_changes(lambda: self.load_file(path, on_loaded=show_hit))
+        
+        def close():
+            cancel_search()
+            search_window.destroy()
+        
+        button_frame = Frame(search_window)
+        button_frame.pack(pady=5)
+        Button(button_frame, text="Search", command=start_search).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Cancel", command=cancel_search).pack(side=LEFT, padx=5)
+        results_list.bind('<Double-Button-1>', open_result)
+        find_entry.bind('<Return>', lambda e: start_search())
+        search_window.protocol("WM_DELETE_WINDOW", close)
+        find_entry.focus_set()
+    
+    def compare_with_file(self):
+        other_path = filedialog.askopenfilename(
+            title="Compare With",
+            filetypes=[
+                ("Text files", "*.txt"),
+                ("Word documents", "*.docx"),
+                ("All files", "*.*")
+            ]
+        )
+        if not other_path:
+            return
+        if other_path.lower().endswith('.docx') and not HAVE_DOCX:
+            messagebox.showerror("Error", "python-docx library not installed.")
+            return
+        current_lines = self.text_area.get(1.0, "end-1c").split('\n')
+        outcome = {}
+        
+        def worker():
+            try:
+                if other_path.lower().endswith('.docx'):
+                    other_text = docx_text_cached(other_path)
+                else:
+                    other_text, _ = read_text_file(other_path)
+                other_lines = other_text.split('\n')
+                start = time.perf_counter()
+                outcome["opcodes"] = diff_lines(current_lines, other_lines)
+                outcome["elapsed"] = time.perf_counter() - start
+                outcome["other_text"] = other_text
+            except Exception as e:
+                outcome["error"] = e
+        
+        def wait_for_diff():
+            if thread.is_alive():
+                self.root.after(50, wait_for_diff)
+                return
+            if "error" in outcome:
+                messagebox.showerror("Compare Error", f"Could not compare files: {str(outcome['error'])}")
+                self.status_bar.config(text="Ready")
+                return
+            self.show_compare_window(other_path, "\n".join(current_lines), outcome["other_text"],
+                                     outcome["opcodes"], outcome["elapsed"])
+        
+        self.status_bar.config(text=f"Comparing with {os.path.basename(other_path)}...")
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        wait_for_diff()
+    
+    def show_compare_window(self, other_path, left_text, right_text, opcodes, elapsed):
+        """Side-by-side compare view; hunks are tagged lazily as they scroll into view"""
+        hunks = [opcode for opcode in opcodes if opcode[0] != "equal"]
+        # Line-number lookups for scroll sync: start lines of every opcode on each side
+        left_starts = [opcode[1] for opcode in opcodes]
+        right_starts = [opcode[3] for opcode in opcodes]
+        hunk_starts = [hunk[1] for hunk in hunks]
+        
+        compare_window = Toplevel(self.root)
+        current_name = os.path.basename(self.current_file) if self.current_file else "Current document"
+        compare_window.title(f"Compare - {current_name} vs {os.path.basename(other_path)}")
+        compare_window.geometry("1100x650")
+        
+        added = sum(hunk[4] - hunk[3] for hunk in hunks)
+        removed = sum(hunk[2] - hunk[1] for hunk in hunks)
+        summary = Label(compare_window, anchor=W,
+                        text=f"{len(hunks)} differences | -{removed} / +{added} lines | computed in {elapsed:.2f}s")
+        summary.pack(side=TOP, fill=X, padx=5)
+        panes = Frame(compare_window)
+        panes.pack(fill=BOTH, expand=True)
+        scrollbar = Scrollbar(panes)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        left = Text(panes, wrap="none", font=self.fonts.get(), width=1)
+        right = Text(panes, wrap="none", font=self.fonts.get(), width=1)
+        left.pack(side=LEFT, fill=BOTH, expand=True)
+        right.pack(side=LEFT, fill=BOTH, expand=True)
+        for pane in (left, right):
+            pane.tag_configure("diff_delete", background="#ffd7d7")
+            pane.tag_configure("diff_insert", background="#d7ffd7")
+            pane.tag_configure("diff_replace", background="#fff3c4")
+        left.config(state=DISABLED)
+        right.config(state=DISABLED)
+        self.insert_chunked(left, "1.0", left_text, label="Loading compare view")
+        self.insert_chunked(right, "1.0", right_text, label="Loading compare view")
+        tagged = set()
+        # Only the pane the user is driving is mirrored; the other pane's own
+        # scroll callbacks would map back through clamped hunks and fight it
+        leader = [left]
+        
+        def map_line(line, from_starts, to_starts, from_index, to_index):
+            # Map a 1-based line on one side to the matching line on the other
+            n = max(0, bisect.bisect_right(from_starts, line - 1) - 1)
+            opcode = opcodes[n] if opcodes else ("equal", 0, 0, 0, 0)
+            offset = line - 1 - opcode[from_index]
+            if opcode[0] != "equal":
+                offset = min(offset, max(0, opcode[to_index + 1] - opcode[to_index] - 1))
+            return opcode[to_index] + offset + 1
+        
+        def visible_lines(pane):
+            first = int(pane.index("@0,0").split('.')[0])
+            last = int(pane.index(f"@0,{pane.winfo_height()}").split('.')[0])
+            return first, last
+        
+        def tag_visible_hunks():
+            first, last = visible_lines(left)
+            start = max(0, bisect.bisect_right(hunk_starts, first - 1) - 1)
+            visible = set()
+            for n in range(start, len(hunks)):
+                tag, i1, i2, j1, j2 = hunks[n]
+                if i1 > last:
+                    break
+                visible.add(n)
+            for n in tagged - visible:
+                tag, i1, i2, j1, j2 = hunks[n]
+                left.tag_remove(f"diff_{tag}", f"{i1 + 1}.0", f"{i2 + 1}.0")
+                right.tag_remove(f"diff_{tag}", f"{j1 + 1}.0", f"{j2 + 1}.0")
+            for n in visible - tagged:
+                tag, i1, i2, j1, j2 = hunks[n]
+                left.tag_add(f"diff_{tag}", f"{i1 + 1}.0", f"{i2 + 1}.0")
+                right.tag_add(f"diff_{tag}", f"{j1 + 1}.0", f"{j2 + 1}.0")
+            tagged.clear()
+            tagged.update(visible)
+        
+        def sync(source, target):
+            def on_scroll(first, last):
+                if source is left:
+                    scrollbar.set(first, last)
+                if source is not leader[0]:
+                    return
+                line = int(source.index("@0,0").split('.')[0])
+                if source is left:
+                    mapped = map_line(line, left_starts, right_starts, 1, 3)
+                else:
+                    mapped = map_line(line, right_starts, left_starts, 3, 1)
+                target.yview(f"{mapped}.0")
+                tag_visible_hunks()
+            return on_scroll
+        
+        def lead(pane):
+            leader[0] = pane
+        
+        def scroll_left(*args):
+            lead(left)
+            left.yview(*args)
+        
+        for pane in (left, right):
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<KeyPress>", "<Button-1>"):
+                pane.bind(sequence, lambda event, pane=pane: lead(pane), add="+")
+        left.config(yscrollcommand=sync(left, right))
+        right.config(yscrollcommand=sync(right, left))
+        scrollbar.config(command=scroll_left)
+        
+        def next_difference():
+            first, _ = visible_lines(left)
+            n = bisect.bisect_right(hunk_starts, first)
+            if n < len(hunks):
+                lead(left)
+                left.yview(f"{hunks[n][1] + 1}.0")
+        
+        Button(compare_window, text="Next Difference", command=next_difference).pack(side=BOTTOM, pady=3)
+        compare_window.after_idle(tag_visible_hunks)
+        self.status_bar.config(text=f"Compared with {os.path.basename(other_path)}: {len(hunks)} differences")
+    
     def choose_font(self):
         font_window = Toplevel(self.root)
         font_window.title("Font Selection")
@@ -796,12 +3615,12 @@ class EnhancedWordPad:
     
     def zoom_in(self):
         self.current_font_size += 1
-        self.apply_current_font()
+        self.schedule_font_update()
     
     def zoom_out(self):
         if self.current_font_size > 6:
             self.current_font_size -= 1
-            self.apply_current_font()
+            self.schedule_font_update()
     
     def reset_zoom(self):
         self.current_font_family = self.default_font
@@ -827,7 +3646,7 @@ class EnhancedWordPad:
         try:
             new_size = int(self.font_size.get())
             self.current_font_size = new_size
-            self.apply_current_font()
+            self.schedule_font_update()
         except ValueError:
             pass
     
@@ -846,7 +3665,7 @@ class EnhancedWordPad:
     def update_cursor_position(self, event=None):
         cursor_pos = self.text_area.index(INSERT)
         line, col = cursor_pos.split('.')
-        self.status_bar.config(text=f"Ready | Font: {self.current_font_family}, {self.current_font_size}pt | Line: {line}, Column: {int(col)+1}")
+        self.status_bar.config(text=f"Ready | Font: {self.current_font_family}, {self.current_font_size}pt | Line: {line}, Column: {int(col)+1} | Undo: {format_size(self.history.memory)}")
     
     def update_line_numbers(self, event=None):
         self.line_numbers.config(state=NORMAL)
@@ -915,13 +3734,17 @@ Alt+F4: Exit"""
         messagebox.showinfo("Keyboard Shortcuts", shortcuts)
     
     def exit_app(self):
-        if self.check_unsaved_changes():
-            self.root.quit()
+        self.check_unsaved_changes(self.root.quit)
     
     def run(self):
         self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
         self.root.mainloop()
 
 if __name__ == "__main__":
-    app = EnhancedWordPad()
-    app.run()
+    # Needed for the Find in Files process pool in frozen (MSI) builds
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        run_benchmarks(sys.argv[2:])
+    else:
+        app = EnhancedWordPad()
+        app.run()
@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+from pypad import diff_lines  # noqa: E402
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a, checking the opcodes tile both sequences"""
+    result = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            assert tag in ("replace", "delete", "insert")
+            assert (i1 < i2) == (tag != "insert") and (j1 < j2) == (tag != "delete")
+            result.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return result
+
+
+def test_random_edits_rebuild_the_target():
+    rng = random.Random(1234)
+    for _ in range(3000):
+        alphabet = [f"line {n}" for n in range(rng.randint(1, 8))]
+        a = [rng.choice(alphabet) for _ in range(rng.randint(0, 30))]
+        b = [rng.choice(alphabet) for _ in range(rng.randint(0, 30))]
+        assert apply_opcodes(a, b, diff_lines(a, b)) == b
+
+
+def test_identical_documents_are_one_equal_run():
+    a = ["one", "two", "three"]
+    assert diff_lines(a, list(a)) == [("equal", 0, 3, 0, 3)]
+    assert diff_lines([], []) == []
+
+
+def test_pure_insert():
+    a = ["a", "b", "c"]
+    b = ["a", "new 1", "new 2", "b", "c"]
+    assert diff_lines(a, b) == [("equal", 0, 1, 0, 1), ("insert", 1, 1, 1, 3), ("equal", 1, 3, 3, 5)]
+
+
+def test_pure_delete():
+    a = ["a", "old 1", "old 2", "b", "c"]
+    b = ["a", "b", "c"]
+    assert diff_lines(a, b) == [("equal", 0, 1, 0, 1), ("delete", 1, 3, 1, 1), ("equal", 3, 5, 1, 3)]
+
+
+def test_edit_limit_falls_back_to_a_valid_coarse_diff():
+    # Repeated lines leave no patience anchors, so the gap goes to Myers,
+    # which gives up past max_edits and reports the region as replaced
+    a = ["x"] * 20 + ["y"] * 20
+    b = ["y"] * 20 + ["x"] * 20
+    opcodes = diff_lines(a, b, max_edits=2)
+    assert apply_opcodes(a, b, opcodes) == b
+    assert opcodes == [("replace", 0, 40, 0, 40)]
+    exact = diff_lines(a, b)
+    assert apply_opcodes(a, b, exact) == b
+    assert sum(i2 - i1 for tag, i1, i2, _, _ in exact if tag == "equal") == 20
@@ -0,0 +1,126 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+from pypad import UndoHistory  # noqa: E402
+
+
+def test_typing_merges_into_one_step():
+    history = UndoHistory()
+    history.record("insert", "1.0", "ab")
+    history.record("insert", "1.2", "c")
+    step = history.pop_undo()
+    assert list(step.edits()) == [("insert", "1.0", "abc")]
+    assert history.pop_undo() is None
+
+
+def test_backspacing_merges_and_keeps_text_order():
+    history = UndoHistory()
+    history.record("delete", "1.2", "c")
+    history.record("delete", "1.1", "b")
+    step = history.pop_undo()
+    assert list(step.inverse()) == [("insert", "1.1", "bc")]
+
+
+def test_widget_backspaces_merge_into_one_step():
+    # The edit hook reports each Backspace as a delete with nothing inserted
+    history = UndoHistory()
+    history.record("insert", "1.0", "abc")
+    history.checkpoint()
+    for index, removed in (("1.2", "c"), ("1.1", "b"), ("1.0", "a")):
+        history.record_replace(index, removed, "")
+    assert list(history.pop_undo().inverse()) == [("insert", "1.0", "abc")]
+    assert list(history.pop_undo().edits()) == [("insert", "1.0", "abc")]
+
+
+def test_widget_forward_deletes_merge_into_one_step():
+    history = UndoHistory()
+    for removed in "abc":
+        history.record_replace("1.0", removed, "")
+    assert list(history.pop_undo().inverse()) == [("insert", "1.0", "abc")]
+    assert history.pop_undo() is None
+
+
+def test_widget_replace_is_grouped():
+    history = UndoHistory()
+    history.record_replace("1.0", "old", "new")
+    history.record_replace("1.3", "x", "")
+    assert list(history.pop_undo().inverse()) == [("insert", "1.3", "x")]
+    assert list(history.pop_undo().inverse()) == [("delete", "1.0", "new"), ("insert", "1.0", "old")]
+
+
+def test_newline_closes_the_step():
+    history = UndoHistory()
+    history.record("insert", "1.0", "one\n")
+    history.record("insert", "2.0", "two")
+    assert list(history.pop_undo().edits()) == [("insert", "2.0", "two")]
+    assert list(history.pop_undo().edits()) == [("insert", "1.0", "one\n")]
+
+
+def test_group_is_undone_as_one_step():
+    history = UndoHistory()
+    with history.group():
+        history.record("delete", "1.0", "old\ntext")
+        history.record("insert", "1.0", "new\n")
+    step = history.pop_undo()
+    assert list(step.inverse()) == [("delete", "1.0", "new\n"), ("insert", "1.0", "old\ntext")]
+    assert history.pop_undo() is None
+
+
+def test_large_payloads_round_trip_through_compression():
+    history = UndoHistory()
+    text = "line of text\n" * 1000
+    with history.group():
+        history.record("insert", "1.0", text)
+    history.checkpoint()
+    assert history.memory < len(text)
+    assert list(history.pop_undo().edits()) == [("insert", "1.0", text)]
+
+
+def test_redo_is_dropped_by_a_new_edit():
+    history = UndoHistory()
+    history.record("insert", "1.0", "a\n")
+    step = history.pop_undo()
+    assert history.redo_steps == [step]
+    history.record("insert", "1.0", "b")
+    assert history.pop_redo() is None
+
+
+def test_oldest_steps_are_evicted_past_the_limit():
+    history = UndoHistory(max_bytes=1000)
+    for n in range(10):
+        history.record("insert", f"{n + 1}.0", "x" * 299 + "\n")
+    assert history.memory <= 1000
+    assert 0 < len(history.undo_steps) < 10
+    assert list(history.pop_undo().edits()) == [("insert", "10.0", "x" * 299 + "\n")]
+
+
+def test_evicted_group_is_not_partially_recorded():
+    # A Replace All on a buffer bigger than the cap: the delete is evicted,
+    # and undoing only the insert would empty the document
+    history = UndoHistory(max_bytes=1000)
+    with history.group():
+        history.record("delete", "1.0", "y" * 1200)
+        history.record("insert", "1.0", "z" * 1200)
+    assert history.pop_undo() is None
+    assert history.memory == 0
+
+
+def test_evicted_chunked_paste_is_discarded_whole():
+    history = UndoHistory(max_bytes=100 * 1024)
+    chunk = "p" * (64 * 1024)
+    with history.group():
+        for n in range(5):
+            history.record("insert", f"1.{n * len(chunk)}", chunk)
+    assert history.pop_undo() is None
+
+
+def test_recording_resumes_after_a_discarded_group():
+    history = UndoHistory(max_bytes=1000)
+    with history.group():
+        history.record("insert", "1.0", "q" * 2000)
+        history.record("insert", "1.2000", "q")
+    history.record("insert", "1.0", "r")
+    assert list(history.pop_undo().edits()) == [("insert", "1.0", "r")]
+    assert history.pop_undo() is None